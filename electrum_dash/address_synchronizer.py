@@ -1006,10 +1006,9 @@ class AddressSynchronizer(Logger):
         coins, spent = self.get_addr_io(address)
         out = {}
         psman = self.psman
-        if psman.enabled:
-            ps_origin_addrs = self.db.get_ps_origin_addrs()
-        else:
-            ps_origin_addrs = []
+        is_ps_origin_addr = (psman.enabled
+                             and psman.group_origin_coins_by_addr
+                             and self.db.is_ps_origin_addr(address))
         for prevout_str, v in coins.items():
             ps_rounds = None
             ps_denom = self.db.get_ps_denom(prevout_str)
@@ -1019,10 +1018,7 @@ class AddressSynchronizer(Logger):
                 ps_collateral = self.db.get_ps_collateral(prevout_str)
                 if ps_collateral:
                     ps_rounds = int(PSCoinRounds.COLLATERAL)
-            if (psman.group_origin_coins_by_addr
-                    and ps_rounds is None
-                    and ps_origin_addrs
-                    and address in ps_origin_addrs):
+            if ps_rounds is None and is_ps_origin_addr:
                 ps_rounds = int(PSCoinRounds.MIX_ORIGIN)
             if ps_rounds is None:
                 ps_other = self.db.get_ps_other(prevout_str)
@@ -22,7 +22,7 @@ from .dash_ps_util import (PSOptsMixin, PSUtilsMixin, PSGUILogHandler,
                            PSTxWorkflow, PSDenominateWorkflow, calc_tx_fee)
 from .dash_tx import PSTxTypes, SPEC_TX_NAMES, CTxIn
 from .logging import Logger
-from .transaction import Transaction, PartialTxOutput, PartialTransaction
+from .transaction import PartialTxOutput, PartialTransaction
 from .util import (NoDynamicFeeEstimates, log_exceptions, SilentTaskGroup,
                    NotEnoughFunds, bfh, is_android)
 from .i18n import _
@@ -504,7 +504,7 @@ class PSManager(Logger, PSKeystoreMixin, PSDataMixin, PSOptsMixin,
                     await self.broadcast_new_collateral_wfl()
                 else:
                     for txid in wfl.tx_order:
-                        tx = Transaction(wfl.tx_data[txid].raw_tx)
+                        tx = wfl.tx_data[txid].tx
                         self._process_by_new_collateral_wfl(txid, tx)
             elif (not self._not_enough_funds
                     and not self.ps_collateral_cnt
@@ -540,7 +540,7 @@ class PSManager(Logger, PSKeystoreMixin, PSDataMixin, PSOptsMixin,
                     await self.broadcast_new_denoms_wfl()
                 else:
                     for txid in wfl.tx_order:
-                        tx = Transaction(wfl.tx_data[txid].raw_tx)
+                        tx = wfl.tx_data[txid].tx
                         self._process_by_new_denoms_wfl(txid, tx)
             elif (not self._not_enough_funds
                     and self.calc_need_denoms_amounts(use_cache=True)):
@@ -997,8 +997,7 @@ class PSManager(Logger, PSKeystoreMixin, PSDataMixin, PSOptsMixin,
             coins = self.filter_out_hw_ks_coins(coins)
             if not coins:
                 raise NotEnoughFunds()
-            coins = sorted(coins, key=lambda x: x.ps_rounds)
-            coins = coins[0:1]
+            coins = [min(coins, key=lambda x: x.ps_rounds)]
 
         no_change = False
         outputs = None
@@ -175,10 +175,11 @@ class PSTxData:
     next_send: minimal time when next send attempt should occur
     '''
 
-    __slots__ = 'uuid tx_type txid raw_tx sent next_send'.split()
+    _fields = 'uuid tx_type txid raw_tx sent next_send'.split()
+    __slots__ = _fields + ['_tx']
 
     def __init__(self, **kwargs):
-        for k in self.__slots__:
+        for k in self._fields:
             if k in kwargs:
                 if k == 'tx_type':
                     setattr(self, k, int(kwargs[k]))
@@ -186,6 +187,14 @@ class PSTxData:
                     setattr(self, k, kwargs[k])
             else:
                 setattr(self, k, None)
+        self._tx = None
+
+    @property
+    def tx(self):
+        '''Transaction parsed from raw_tx, cached on first access'''
+        if self._tx is None:
+            self._tx = Transaction(self.raw_tx)
+        return self._tx
 
     def _as_dict(self):
         '''return dict txid -> (uuid, sent, next_send, tx_type, raw_tx)'''
@@ -207,7 +216,7 @@ class PSTxData:
             return False
         if id(self) == id(other):
             return True
-        for k in self.__slots__:
+        for k in self._fields:
             if getattr(self, k) != getattr(other, k):
                 return False
         return True
@@ -223,8 +232,7 @@ class PSTxData:
             if next_send and next_send > now:
                 return False, err
         try:
-            tx = Transaction(self.raw_tx)
-            await psman.network.broadcast_transaction(tx)
+            await psman.network.broadcast_transaction(self.tx)
             self.sent = time.time()
             return True, err
         except Exception as e:
@@ -455,7 +463,7 @@ class PSGUILogHandler(logging.Handler):
             self.psman.postpone_notification('ps-log-changes', self.psman)
 
 
-@attr.s
+@attr.s(slots=True)
 class DSMsgStat():
     '''Outgoing ds message statistics'''
     msg_sent = attr.ib(type=float, default=0.0)
@@ -514,7 +522,7 @@ class DSMsgStat():
         self.error_cnt += 1
 
 
-@attr.s
+@attr.s(slots=True)
 class MixingStats():
     '''Outgoing ds messages statistics grouped together'''
     dsa = attr.ib(type=DSMsgStat, default=attr.Factory(DSMsgStat))
@@ -614,7 +622,8 @@ class PSOptsMixin:
         if self.calc_denoms_method != self.CalcDenomsMethod.ABS:
             return self.wallet.db.get_ps_data('keep_amount',
                                               self.DEFAULT_KEEP_AMOUNT)
-        return sum(v * self.abs_denoms_cnt[v] for v in PS_DENOMS_VALS)/COIN
+        abs_denoms_cnt = self.abs_denoms_cnt  # property reads wallet db
+        return sum(v * cnt for v, cnt in abs_denoms_cnt.items())/COIN
 
     @keep_amount.setter
     def keep_amount(self, amount):
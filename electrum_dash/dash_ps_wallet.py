@@ -1385,17 +1385,14 @@ class PSDataMixin:
             cur_approx_amounts = []
 
             for dval in PS_DENOMS_VALS:
-                for dn in range(11):  # max 11 values of same denom
-                    if denoms_total + dval > need_amount:
-                        if dval == MIN_DENOM_VAL:
-                            approx_found = True
-                            denoms_total += dval
-                            cur_approx_amounts.append(dval)
-                        break
-                    else:
-                        denoms_total += dval
-                        cur_approx_amounts.append(dval)
-                if approx_found:
+                # max 11 values of same denom
+                cnt = min(11, max(0, (need_amount - denoms_total) // dval))
+                denoms_total += dval * cnt
+                cur_approx_amounts.extend([dval] * cnt)
+                if cnt < 11 and dval == MIN_DENOM_VAL:
+                    approx_found = True
+                    denoms_total += dval
+                    cur_approx_amounts.append(dval)
                     break
 
             denoms_amounts.append(cur_approx_amounts)
@@ -1413,10 +1410,9 @@ class PSDataMixin:
             d_cur_cnt = cur_cnt.get(d, 0)
             d_abs_cnt = abs_cnt[d]
             if d_abs_cnt > d_cur_cnt:
-                for i in range(d_abs_cnt-d_cur_cnt):
-                    if need_amount >= d:
-                        need_amount -= d
-                        denoms_amounts.append(d)
+                cnt = min(d_abs_cnt - d_cur_cnt, need_amount // d)
+                need_amount -= d * cnt
+                denoms_amounts.extend([d] * cnt)
         if not denoms_amounts:
             return []
         return [denoms_amounts]
@@ -7,7 +7,10 @@ import shutil
 import tempfile
 import time
 from collections import defaultdict, Counter
+from contextlib import contextmanager
+from functools import wraps
 from pprint import pprint
+from unittest import mock
 
 from electrum_dash import dash_ps, ecc
 from electrum_dash.address_synchronizer import (TX_HEIGHT_LOCAL,
@@ -15,8 +18,9 @@ from electrum_dash.address_synchronizer import (TX_HEIGHT_LOCAL,
                                                 TX_HEIGHT_UNCONFIRMED)
 from electrum_dash.bitcoin import COIN
 from electrum_dash.dash_ps_util import (COLLATERAL_VAL, CREATE_COLLATERAL_VAL,
-                                        CREATE_COLLATERAL_VALS, PS_DENOMS_VALS,
-                                        MIN_DENOM_VAL, PSMinRoundsCheckFailed,
+                                        CREATE_COLLATERAL_VALS, PS_DENOMS_DICT,
+                                        PS_DENOMS_VALS, MIN_DENOM_VAL,
+                                        PSMinRoundsCheckFailed,
                                         PSPossibleDoubleSpendError,
                                         PSStates, PSTxWorkflow, PSTxData,
                                         PSDenominateWorkflow, filter_log_line,
@@ -26,6 +30,7 @@ from electrum_dash.dash_ps_util import (COLLATERAL_VAL, CREATE_COLLATERAL_VAL,
                                         MixingStats)
 from electrum_dash.dash_ps_wallet import (KPStates, KP_ALL_TYPES, KP_SPENDABLE,
                                           KP_PS_COINS, KP_PS_CHANGE,
+                                          KP_INCOMING,
                                           PSKsInternalAddressCorruption)
 from electrum_dash.dash_tx import PSTxTypes, SPEC_TX_NAMES
 from electrum_dash import keystore
@@ -44,6 +49,29 @@ TEST_MNEMONIC = ('total small during tattoo congress faith'
                  ' acoustic fashion zone fringe fit crisp')
 
 
+# (in_cnt, out_cnt, max_size, expected tx size)
+CALC_TX_SIZE_TEST_DATA = [
+    # average sizes
+    (1, 1, False, 192),
+    (1, 2, False, 226),
+    (255, 1, False, 37786),
+    (1, 255, False, 8830),
+    (255, 255, False, 46424),
+    (1000, 1, False, 148046),
+    (1, 1000, False, 34160),
+    (1000, 1000, False, 182014),
+    # max sizes
+    (1, 1, True, 193),
+    (1, 2, True, 227),
+    (255, 1, True, 38041),
+    (1, 255, True, 8831),
+    (255, 255, True, 46679),
+    (1000, 1, True, 149046),
+    (1, 1000, True, 34161),
+    (1000, 1000, True, 183014),
+]
+
+
 class NetworkBroadcastMock:
 
     def __init__(self, pass_cnt=None):
@@ -77,38 +105,178 @@ class WalletGetTxHeigthMock:
         return TxMinedInfo(height=height, conf=0)
 
 
+def with_found_ps_txs(test_func):
+    '''Start test on wallet with PS data found by find_untracked_ps_txs'''
+    test_func.with_found_ps_txs = True
+    return test_func
+
+
+@contextmanager
+def mixing_state(psman):
+    '''Set PSManager state to Mixing, restore previous state on exit'''
+    prev_state = psman.state
+    psman.state = PSStates.Mixing
+    try:
+        yield psman
+    finally:
+        psman.state = prev_state
+
+
+def spendable_coins(w, **kwargs):
+    '''Get wallet utxos not frozen by address or by outpoint'''
+    coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
+                        **kwargs)
+    return [c for c in coins if not w.is_frozen_coin(c)]
+
+
+def enable_ps_ks(func):
+    '''Enable PS Keystore on test wallet before test run'''
+    @wraps(func)
+    def setup_multi_ks(self, *args, **kwargs):
+        self.wallet.psman.enable_ps_keystore()
+        return func(self, *args, **kwargs)
+    return setup_multi_ks
+
+
+def synchronize_ps_ks(func):
+    '''Generate PS Keystore addresses before test run'''
+    @wraps(func)
+    def generate_ps_addrs(self, *args, **kwargs):
+        self.wallet.psman.synchronize()
+        return func(self, *args, **kwargs)
+    return generate_ps_addrs
+
+
 class PSWalletTestCase(TestCaseForTestnet):
 
-    def setUp(self):
-        super(PSWalletTestCase, self).setUp()
-        self.user_dir = tempfile.mkdtemp()
-        self.wallet_path = os.path.join(self.user_dir, 'wallet_ps1')
-        tests_path = os.path.dirname(os.path.abspath(__file__))
-        test_data_file = os.path.join(tests_path, 'data', 'wallet_ps1.gz')
-        shutil.copyfile(test_data_file, '%s.gz' % self.wallet_path)
-        with gzip.open('%s.gz' % self.wallet_path, 'rb') as rfh:
-            wallet_data = rfh.read()
-            wallet_data = wallet_data.decode('utf-8')
-        with open(self.wallet_path, 'w') as wfh:
+    wallet_data = None  # decompressed wallet_ps1 data, shared by tests
+    found_ps_txs_wallet_data = None  # wallet_ps1 data after PS txs is found
+    spendable_kp_cache = None  # keypairs cache of cleanup_spendable tests
+
+    @classmethod
+    def setUpClass(cls):
+        super(PSWalletTestCase, cls).setUpClass()
+        if cls.wallet_data is None:
+            tests_path = os.path.dirname(os.path.abspath(__file__))
+            test_data_file = os.path.join(tests_path, 'data', 'wallet_ps1.gz')
+            with gzip.open(test_data_file, 'rb') as rfh:
+                cls.wallet_data = rfh.read().decode('utf-8')
+        cls._build_spendable_kp_cache()
+
+    @classmethod
+    def tearDownClass(cls):
+        super(PSWalletTestCase, cls).tearDownClass()
+        cls.spendable_kp_cache = None
+
+    @classmethod
+    def _load_wallet(cls, user_dir, wallet_data, loop):
+        '''Load test wallet from wallet_data in user_dir'''
+        wallet_path = os.path.join(user_dir, 'wallet_ps1')
+        with open(wallet_path, 'w') as wfh:
             wfh.write(wallet_data)
-        self.config = SimpleConfig({'electrum_path': self.user_dir})
-        self.config.set_key('dynamic_fees', False, True)
-        self.storage = WalletStorage(self.wallet_path)
-        self.w_db = WalletDB(self.storage.read(), manual_upgrades=True)
-        self.w_db.upgrade()  # wallet_ps1 have version 18
-        self.wallet = Wallet(self.w_db, self.storage, config=self.config)
-        psman = self.wallet.psman
+        config = SimpleConfig({'electrum_path': user_dir})
+        config.set_key('dynamic_fees', False, True)
+        storage = WalletStorage(wallet_path)
+        w_db = WalletDB(storage.read(), manual_upgrades=True)
+        if w_db.requires_upgrade():
+            w_db.upgrade()  # wallet_ps1 have version 18
+        wallet = Wallet(w_db, storage, config=config)
+        psman = wallet.psman
         psman.MIN_NEW_DENOMS_DELAY = 0
         psman.MAX_NEW_DENOMS_DELAY = 0
         psman.state = PSStates.Ready
-        psman.loop = asyncio.get_event_loop()
+        psman.loop = loop
         psman.can_find_untracked = lambda: True
         psman.is_unittest_run = True
+        return wallet
+
+    @staticmethod
+    def _freeze_for_spendable_keypairs(w):
+        '''Freeze coins to make small change amount on new denoms txs'''
+        selected_coins_vals = {801806773, 50000000, 1000000}
+        coins_str = {c.prevout.to_str()
+                     for c in spendable_coins(w, mature_only=True)
+                     if c.value_sats() not in selected_coins_vals}
+        w.set_frozen_state_of_coins(coins_str, True)
+
+    @classmethod
+    def _build_spendable_kp_cache(cls):
+        '''Cache keypairs used by test_cleanup_spendable_keypairs* once'''
+        # keypairs cache does not depend on group_origin_coins_by_addr,
+        # so one cache built with default setting serves both tests
+        user_dir = tempfile.mkdtemp()
+        loop = asyncio.new_event_loop()
+        try:
+            w = cls._load_wallet(user_dir, cls.wallet_data, loop)
+            psman = w.psman
+            loop.run_until_complete(psman.find_untracked_ps_txs(log=False))
+            cls._freeze_for_spendable_keypairs(w)
+            psman.keep_amount = 16
+            psman.state = PSStates.Mixing
+            psman._cache_keypairs(password=None)
+            assert psman.keypairs_state == KPStates.Ready
+            cls.spendable_kp_cache = copy.deepcopy(psman._keypairs_cache)
+            psman.state = PSStates.Ready
+        finally:
+            cls.close_event_loop(loop)
+            shutil.rmtree(user_dir)
+
+    def setUp(self):
+        super(PSWalletTestCase, self).setUp()
+        self.user_dir = tempfile.mkdtemp()
+        self.loop = asyncio.new_event_loop()
+        self.parsed_txs = {}  # raw_tx -> Transaction
+        test_func = getattr(self, self._testMethodName)
+        with_found_ps_txs = getattr(test_func, 'with_found_ps_txs', False)
+        found_data = PSWalletTestCase.found_ps_txs_wallet_data
+        if with_found_ps_txs and found_data:
+            wallet_data = found_data  # already upgraded
+        else:
+            wallet_data = self.wallet_data
+        self.wallet = self._load_wallet(self.user_dir, wallet_data, self.loop)
+        self.config = self.wallet.config
+        self.storage = self.wallet.storage
+        self.w_db = self.wallet.db
+        psman = self.wallet.psman
+        if with_found_ps_txs and not found_data:
+            # find PS txs once, next tests are started from saved result
+            self.run_coro(psman.find_untracked_ps_txs(log=False))
+            PSWalletTestCase.found_ps_txs_wallet_data = self.w_db.dump()
 
     def tearDown(self):
         super(PSWalletTestCase, self).tearDown()
+        self.close_event_loop(self.loop)
         shutil.rmtree(self.user_dir)
 
+    def get_wfl_tx(self, wfl, txid):
+        '''Get workflow tx parsed only once during the test'''
+        raw_tx = wfl.tx_data[txid].raw_tx
+        tx = self.parsed_txs.get(raw_tx)
+        if tx is None:
+            tx = self.parsed_txs[raw_tx] = Transaction(raw_tx)
+        return tx
+
+    def run_coro(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    @staticmethod
+    def close_event_loop(loop):
+        # let callbacks from run_coroutine_threadsafe create their tasks
+        loop.run_until_complete(asyncio.sleep(0))
+        if hasattr(asyncio, 'all_tasks'):
+            tasks = asyncio.all_tasks(loop)
+        else:  # python 3.6
+            tasks = asyncio.Task.all_tasks(loop)
+        if tasks:
+            for t in tasks:
+                t.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks,
+                                                   return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        if hasattr(loop, 'shutdown_default_executor'):  # python 3.9+
+            loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
     def test_ps_coin_rounds_str(self):
         assert ps_coin_rounds_str(PSCoinRounds.MINUSINF) == 'Unknown'
         assert ps_coin_rounds_str(PSCoinRounds.OTHER) == 'Other'
@@ -142,17 +310,21 @@ class PSWalletTestCase(TestCaseForTestnet):
         # test send
         t1 = time.time()
         psman.network = NetworkBroadcastMock(pass_cnt=1)
-        coro = tx_data.send(psman)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(tx_data.send(psman))
         t2 = time.time()
         assert t2 > tx_data.sent > t1
 
+        # test tx parsed once and not compared by __eq__
+        assert tx_data.tx is tx_data.tx
+        assert tx_data.tx.serialize() == raw_tx
+        new_tx_data.sent = tx_data.sent
+        assert new_tx_data == tx_data
+
         # test next_send
         tx_data.sent = None
         t1 = time.time()
         psman.network = NetworkBroadcastMock(pass_cnt=0)
-        coro = tx_data.send(psman)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(tx_data.send(psman))
         t2 = time.time()
         assert tx_data.sent is None
         assert t2 > tx_data.next_send - 10 > t1
@@ -325,8 +497,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         c_outpoint, ps_collateral = w.db.get_ps_collateral()
         assert c_outpoint is None
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        found_txs = asyncio.get_event_loop().run_until_complete(coro)
+        found_txs = self.run_coro(psman.find_untracked_ps_txs(log=False))
         assert found_txs == 86
         assert len(ps_txs) == 86
         assert len(ps_denoms) == 131
@@ -337,8 +508,7 @@ class PSWalletTestCase(TestCaseForTestnet):
                               '057673ebae64d05864827b5dd808fb23:0')
         assert ps_collateral == ('yiozDzgTrjyXqie28y7z2YEmjaYUZ7gveQ', 20000)
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        found_txs = asyncio.get_event_loop().run_until_complete(coro)
+        found_txs = self.run_coro(psman.find_untracked_ps_txs(log=False))
         assert found_txs == 0
         assert len(ps_txs) == 86
         assert len(ps_denoms) == 131
@@ -349,10 +519,8 @@ class PSWalletTestCase(TestCaseForTestnet):
                               '057673ebae64d05864827b5dd808fb23:0')
         assert ps_collateral == ('yiozDzgTrjyXqie28y7z2YEmjaYUZ7gveQ', 20000)
 
+    @with_found_ps_txs
     def test_ps_history_show_all(self):
-        psman = self.wallet.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         # check with show_dip2_tx_type on
         self.config.set_key('show_dip2_tx_type', True, True)
         h = self.wallet.get_detailed_history()
@@ -411,10 +579,8 @@ class PSWalletTestCase(TestCaseForTestnet):
             assert not tx['group_txid']
             assert tx['group_data'] == []
 
+    @with_found_ps_txs
     def test_ps_history_show_grouped(self):
-        psman = self.wallet.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
 
         # check with show_dip2_tx_type off
         self.config.set_key('show_dip2_tx_type', False, True)
@@ -532,10 +698,8 @@ class PSWalletTestCase(TestCaseForTestnet):
             if i in range(83, 86):
                 assert txf[i]['group_txid'] == txf[86]['txid']
 
+    @with_found_ps_txs
     def test_ps_get_utxos_all(self):
-        psman = self.wallet.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         ps_denoms = self.wallet.db.get_ps_denoms()
         for utxo in self.wallet.get_utxos():
             ps_rounds = utxo.ps_rounds
@@ -557,8 +721,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert wallet.get_balance(include_ps=False, min_rounds=1) == (0, 0, 0)
         assert wallet.get_balance(include_ps=False, min_rounds=0) == (0, 0, 0)
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
         assert wallet.get_balance() == (1484831773, 0, 0)
         assert wallet.get_balance(include_ps=False) == (984806773, 0, 0)
         assert wallet.get_balance(include_ps=False, min_rounds=5) == (0, 0, 0)
@@ -574,7 +737,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         # check balance with ps_other
         w = wallet
         coins = w.get_spendable_coins(domain=None)
-        denom_addr = list(w.db.get_ps_denoms().values())[0][0]
+        denom_addr = next(iter(w.db.get_ps_denoms().values()))[0]
         outputs = [PartialTxOutput.from_address_and_value(denom_addr, 300000)]
         tx = w.make_unsigned_transaction(coins=coins, outputs=outputs)
         w.sign_transaction(tx, None)
@@ -595,8 +758,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert wallet.get_balance(include_ps=False, min_rounds=0) == \
             (500005000, 0, 0)
 
-        coro = psman.find_untracked_ps_txs(log=True)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=True))
 
         # check when transaction is other ps coins
         assert wallet.get_balance() == (1484831547, 0, 0)
@@ -615,8 +777,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         C_RNDS = PSCoinRounds.COLLATERAL
         assert self.wallet.db.get_ps_addresses() == set()
         psman = self.wallet.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
         assert len(self.wallet.db.get_ps_addresses()) == 317
         assert len(self.wallet.db.get_ps_addresses(min_rounds=C_RNDS)) == 317
         assert len(self.wallet.db.get_ps_addresses(min_rounds=0)) == 131
@@ -624,11 +785,9 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert len(self.wallet.db.get_ps_addresses(min_rounds=2)) == 77
         assert len(self.wallet.db.get_ps_addresses(min_rounds=3)) == 0
 
+    @with_found_ps_txs
     def test_get_spendable_coins(self):
         C_RNDS = PSCoinRounds.COLLATERAL
-        psman = self.wallet.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         coins = self.wallet.get_spendable_coins(None)
         assert len(coins) == 6
         for c in coins:
@@ -693,23 +852,21 @@ class PSWalletTestCase(TestCaseForTestnet):
         coins = self.wallet.get_spendable_coins(None, min_rounds=3)
         assert len(coins) == 0
 
+    @with_found_ps_txs
     def test_get_spendable_coins_allow_others(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
 
         # add other coins
         coins = w.get_spendable_coins(domain=None)
-        denom_addr = list(w.db.get_ps_denoms().values())[0][0]
+        denom_addr = next(iter(w.db.get_ps_denoms().values()))[0]
         outputs = [PartialTxOutput.from_address_and_value(denom_addr, 300000)]
         tx = w.make_unsigned_transaction(coins=coins, outputs=outputs)
         w.sign_transaction(tx, None)
         txid = tx.txid()
         w.add_transaction(tx)
         w.db.add_islock(txid)
-        coro = psman.find_untracked_ps_txs(log=True)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=True))
 
         assert not psman.allow_others
         coins = w.get_spendable_coins(domain=None, include_ps=True)
@@ -724,11 +881,9 @@ class PSWalletTestCase(TestCaseForTestnet):
                         PSCoinRounds.COLLATERAL, PSCoinRounds.OTHER}
         assert len(coins) == 139
 
+    @with_found_ps_txs
     def test_get_utxos(self):
         C_RNDS = PSCoinRounds.COLLATERAL
-        psman = self.wallet.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         coins = self.wallet.get_utxos()
         assert len(coins) == 6
         for c in coins:
@@ -736,64 +891,18 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         coins = self.wallet.get_utxos(include_ps=True)
         assert len(coins) == 138
-        rounds = defaultdict(int)
-        for c in coins:
-            rounds[c.ps_rounds] += 1
-        assert rounds[None] == 6
-        assert rounds[C_RNDS] == 1
-        assert rounds[0] == 53
-        assert rounds[1] == 1
-        assert rounds[2] == 77
-        assert rounds[3] == 0
-        assert rounds[4] == 0
-
-        coins = self.wallet.get_utxos(min_rounds=C_RNDS)
-        assert len(coins) == 132
-        rounds = defaultdict(int)
-        for c in coins:
-            rounds[c.ps_rounds] += 1
-        assert rounds[C_RNDS] == 1
-        assert rounds[0] == 53
-        assert rounds[1] == 1
-        assert rounds[2] == 77
-        assert rounds[3] == 0
-        assert rounds[4] == 0
-
-        coins = self.wallet.get_utxos(min_rounds=0)
-        assert len(coins) == 131
-        rounds = defaultdict(int)
-        for c in coins:
-            rounds[c.ps_rounds] += 1
-        assert None not in rounds
-        assert rounds[0] == 53
-        assert rounds[1] == 1
-        assert rounds[2] == 77
-        assert rounds[3] == 0
-
-        coins = self.wallet.get_utxos(min_rounds=1)
-        assert len(coins) == 78
-        rounds = defaultdict(int)
-        for c in coins:
-            rounds[c.ps_rounds] += 1
-        assert None not in rounds
-        assert 0 not in rounds
-        assert rounds[1] == 1
-        assert rounds[2] == 77
-        assert rounds[3] == 0
-
-        coins = self.wallet.get_utxos(min_rounds=2)
-        assert len(coins) == 77
-        rounds = defaultdict(int)
-        for c in coins:
-            rounds[c.ps_rounds] += 1
-        assert None not in rounds
-        assert 0 not in rounds
-        assert 1 not in rounds
-        assert rounds[2] == 77
-        assert rounds[3] == 0
-
-        coins = self.wallet.get_utxos(min_rounds=3)
-        assert len(coins) == 0
+        rounds = Counter(c.ps_rounds for c in coins)
+        assert rounds == {None: 6, C_RNDS: 1, 0: 53, 1: 1, 2: 77}
+
+        # coins selected by min_rounds is a subset of histogram above
+        for min_rounds, coins_cnt in [(C_RNDS, 132), (0, 131), (1, 78),
+                                      (2, 77), (3, 0)]:
+            coins = self.wallet.get_utxos(min_rounds=min_rounds)
+            assert len(coins) == coins_cnt
+            assert Counter(c.ps_rounds for c in coins) == {
+                r: cnt for r, cnt in rounds.items()
+                if r is not None and r >= min_rounds
+            }
 
     def test_keep_amount(self):
         psman = self.wallet.psman
@@ -877,11 +986,10 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert not psman.gather_mix_stat
         assert psman.gather_mix_stat is False
 
+    @with_found_ps_txs
     def test_check_min_rounds(self):
         C_RNDS = PSCoinRounds.COLLATERAL
         psman = self.wallet.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         coins = self.wallet.get_utxos()
         with self.assertRaises(PSMinRoundsCheckFailed):
             psman.check_min_rounds(coins, 0)
@@ -907,8 +1015,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman = self.wallet.psman
         psman.mix_rounds = 2
         assert psman.mixing_progress() == 0
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
         assert psman.mixing_progress() == 77
         psman.mix_rounds = 3
         assert psman.mixing_progress() == 51
@@ -946,7 +1053,7 @@ class PSWalletTestCase(TestCaseForTestnet):
             psman.abs_denoms_cnt = {v: 20 for v in PS_DENOMS_VALS[1:]}
         psman.abs_denoms_cnt = abs_cnt
         abs_cnt.update({100001: 10, 1000010: 30})
-        psman.abs_denoms_cnt = copy.deepcopy(abs_cnt)
+        psman.abs_denoms_cnt = dict(abs_cnt)
         assert psman.abs_denoms_cnt == abs_cnt
 
     def test_is_waiting(self):
@@ -980,11 +1087,10 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.keypairs_state = KPStates.Caching
         assert not psman.is_waiting
 
+    @with_found_ps_txs
     def test_get_change_addresses_for_new_transaction(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         unused1 = w.calc_unused_change_addresses()
         assert len(unused1) == 17
         for addr in unused1:
@@ -996,11 +1102,10 @@ class PSWalletTestCase(TestCaseForTestnet):
             for addr in addrs:
                 assert addr not in unused1
 
+    @with_found_ps_txs
     def test_synchronize_sequence(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         unused1 = w.get_unused_addresses()
         assert len(unused1) == 20
 
@@ -1017,11 +1122,10 @@ class PSWalletTestCase(TestCaseForTestnet):
         unused2 = w.get_unused_addresses()
         assert len(unused2) == 0
 
+    @with_found_ps_txs
     def test_synchronize_sequence_for_change(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         unused1 = w.calc_unused_change_addresses()
         assert len(unused1) == 17
 
@@ -1038,11 +1142,10 @@ class PSWalletTestCase(TestCaseForTestnet):
         unused2 = w.calc_unused_change_addresses()
         assert len(unused2) == 0
 
+    @with_found_ps_txs
     def test_reserve_addresses(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
 
         ps_addrs = w.db.get_ps_addresses()
         assert len(set(w.get_receiving_addresses()) - ps_addrs) == 21
@@ -1201,24 +1304,33 @@ class PSWalletTestCase(TestCaseForTestnet):
         w.db.add_ps_origin_addrs(txid1, addr1)
         assert w.db.get_ps_origin_addrs() == [addr1]
         w.db.add_ps_origin_addrs(txid2, [addr1, addr2])
-        assert sorted(w.db.get_ps_origin_addrs()) == [addr1, addr2]
+        self.assertCountEqual(w.db.get_ps_origin_addrs(), [addr1, addr2])
         w.db.add_ps_origin_addrs(txid3, [addr2, addr3])
-        assert sorted(w.db.get_ps_origin_addrs()) == [addr1, addr2, addr3]
+        self.assertCountEqual(w.db.get_ps_origin_addrs(),
+                              [addr1, addr2, addr3])
 
         assert w.db.get_tx_ps_origin_addrs(txid3) == [addr2, addr3]
         assert w.db.pop_ps_origin_addrs(txid3) == [addr2, addr3]
         assert w.db.pop_ps_origin_addrs(txid3) is None
-        assert sorted(w.db.get_ps_origin_addrs()) == [addr1, addr2]
+        self.assertCountEqual(w.db.get_ps_origin_addrs(), [addr1, addr2])
+
+        assert w.db.is_ps_origin_addr(addr2)
+        assert not w.db.is_ps_origin_addr(addr3)
 
         assert w.db.get_tx_ps_origin_addrs(txid2) == [addr1, addr2]
         assert w.db.pop_ps_origin_addrs(txid2) == [addr1, addr2]
         assert w.db.pop_ps_origin_addrs(txid2) is None
-        assert sorted(w.db.get_ps_origin_addrs()) == [addr1]
+        self.assertCountEqual(w.db.get_ps_origin_addrs(), [addr1])
+        assert not w.db.is_ps_origin_addr(addr2)
+
+        w.db.add_ps_origin_addrs(txid1, [addr3])  # overwrite txid1 data
+        self.assertCountEqual(w.db.get_ps_origin_addrs(), [addr3])
+        w.db.add_ps_origin_addrs(txid1, [addr1])
 
         assert w.db.get_tx_ps_origin_addrs(txid1) == [addr1]
         assert w.db.pop_ps_origin_addrs(txid1) == [addr1]
         assert w.db.pop_ps_origin_addrs(txid1) is None
-        assert sorted(w.db.get_ps_origin_addrs()) == []
+        self.assertCountEqual(w.db.get_ps_origin_addrs(), [])
 
     def test_denoms_to_mix_cache(self):
         w = self.wallet
@@ -1260,8 +1372,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.pop_ps_denom(outpoint4)
 
         psman.mix_rounds = 2
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
         denoms = psman._denoms_to_mix_cache
         assert len(denoms) == 54
         for outpoint, denom in denoms.items():
@@ -1321,8 +1432,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.pop_ps_denom(outpoint4)
 
         psman.mix_rounds = 2
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
         denoms = psman.denoms_to_mix()
         assert len(denoms) == 54
         for outpoint, denom in denoms.items():
@@ -1477,17 +1587,14 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman = w.psman
 
         # check not created if no ps_collateral exists
-        coro = psman.prepare_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.prepare_pay_collateral_wfl())
         assert not psman.pay_collateral_wfl
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
         # check not created if pay_collateral_wfl is not empty
         wfl = PSTxWorkflow(uuid='uuid')
         psman.set_pay_collateral_wfl(wfl)
-        coro = psman.prepare_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.prepare_pay_collateral_wfl())
         assert psman.pay_collateral_wfl == wfl
         psman.clear_pay_collateral_wfl()
 
@@ -1497,15 +1604,13 @@ class PSWalletTestCase(TestCaseForTestnet):
         outpoint0 = '0'*64 + ':0'
         collateral0 = (w.dummy_address(), 40000)
         w.db.add_ps_collateral(outpoint0, collateral0)
-        coro = psman.prepare_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.prepare_pay_collateral_wfl())
         assert not psman.pay_collateral_wfl
         w.db.pop_ps_collateral(outpoint0)
         w.db.add_ps_collateral(c_outpoint, ps_collateral)
 
         # check created pay collateral tx
-        coro = psman.prepare_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.prepare_pay_collateral_wfl())
         wfl = psman.pay_collateral_wfl
         assert wfl.completed
         assert len(wfl.tx_order) == 1
@@ -1534,30 +1639,24 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         # check if pay_collateral_wfl is empty
         assert not psman.pay_collateral_wfl
-        coro = psman.cleanup_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_pay_collateral_wfl())
         assert not psman.pay_collateral_wfl
 
         # check no cleanup if completed and tx_order is not empty
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
-        coro = psman.prepare_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        coro = psman.cleanup_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
+        self.run_coro(psman.prepare_pay_collateral_wfl())
+        self.run_coro(psman.cleanup_pay_collateral_wfl())
         assert psman.pay_collateral_wfl
 
         # check cleanup if not completed and tx_order is not empty
         wfl = psman.pay_collateral_wfl
-        for outpoint, ps_collateral in w.db.get_ps_collaterals().items():
-            pass
+        outpoint, ps_collateral = w.db.get_ps_collateral()
         reserved = w.db.select_ps_reserved(for_change=True, data=outpoint)
         assert len(reserved) == 1
 
         wfl.completed = False
         psman.set_pay_collateral_wfl(wfl)
-        coro = psman.cleanup_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_pay_collateral_wfl())
         assert w.db.get_ps_spending_collaterals() == {}
 
         assert not psman.pay_collateral_wfl
@@ -1569,26 +1668,22 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         # check cleaned up with force
         assert not psman.pay_collateral_wfl
-        coro = psman.prepare_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.prepare_pay_collateral_wfl())
         assert psman.pay_collateral_wfl
-        coro = psman.cleanup_pay_collateral_wfl(force=True)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_pay_collateral_wfl(force=True))
         assert not psman.pay_collateral_wfl
         assert w.db.get_ps_spending_collaterals() == {}
 
+    @with_found_ps_txs
     def test_process_by_pay_collateral_wfl(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         old_c_outpoint, old_collateral = w.db.get_ps_collateral()
-        coro = psman.prepare_pay_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.prepare_pay_collateral_wfl())
 
         wfl = psman.pay_collateral_wfl
         txid = wfl.tx_order[0]
-        tx = Transaction(wfl.tx_data[txid].raw_tx)
+        tx = self.get_wfl_tx(wfl, txid)
         w.add_unverified_tx(txid, TX_HEIGHT_UNCONFIRMED)
         assert not w.is_local_tx(txid)
         psman._add_ps_data(txid, tx, PSTxTypes.PAY_COLLATERAL)
@@ -1600,32 +1695,27 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert reserved == []
         new_c_outpoint, new_collateral = w.db.get_ps_collateral()
         out0 = tx.outputs()[0]
-        assert new_collateral[0] == out0.address
-        assert new_collateral[1] == out0.value
-        assert new_c_outpoint == f'{txid}:0'
+        assert ((new_c_outpoint, tuple(new_collateral))
+                == (f'{txid}:0', (out0.address, out0.value)))
         spent_c = w.db.get_ps_spent_collaterals()
         assert spent_c[old_c_outpoint] == old_collateral
         assert w.db.get_ps_spending_collaterals() == {}
 
+    @with_found_ps_txs
     def test_create_new_collateral_wfl(self):
         w = self.wallet
         psman = w.psman
-
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
 
         # check not created if new_collateral_wfl is not empty
         wfl = PSTxWorkflow(uuid='uuid')
         psman.set_new_collateral_wfl(wfl)
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_collateral_wfl())
         assert psman.new_collateral_wfl == wfl
         psman.clear_new_collateral_wfl()
 
         # check prepared tx
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_collateral_wfl())
         wfl = psman.new_collateral_wfl
         assert wfl.completed
         assert len(wfl.tx_order) == 1
@@ -1640,26 +1730,23 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert txouts[0].value == CREATE_COLLATERAL_VAL
         assert txouts[0].address in w.db.select_ps_reserved(data=wfl.uuid)
 
+    @with_found_ps_txs
     def test_create_new_collateral_wfl_group_origin_by_addr(self):
         w = self.wallet
         psman = w.psman
         psman.group_origin_coins_by_addr = True
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
 
         # check not created if new_collateral_wfl is not empty
         wfl = PSTxWorkflow(uuid='uuid')
         psman.set_new_collateral_wfl(wfl)
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_collateral_wfl())
         assert psman.new_collateral_wfl == wfl
         psman.clear_new_collateral_wfl()
 
         # check prepared tx
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_collateral_wfl())
         wfl = psman.new_collateral_wfl
         assert wfl.completed
         assert len(wfl.tx_order) == 1
@@ -1674,15 +1761,12 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert txouts[0].value == CREATE_COLLATERAL_VAL
         assert txouts[0].address in w.db.select_ps_reserved(data=wfl.uuid)
 
+    @with_found_ps_txs
     def test_create_new_collateral_wfl_from_gui(self):
         w = self.wallet
         psman = w.psman
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
-
         coins = w.get_spendable_coins(domain=None)
-        coins = sorted([c for c in coins], key=lambda x: x.value_sats())
         # check selected to many utxos
         assert not psman.new_collateral_from_coins_info(coins)
         wfl, err = psman.create_new_collateral_wfl_from_gui(coins, None)
@@ -1690,7 +1774,8 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert not wfl
 
         # check selected to large utxo
-        assert not psman.new_collateral_from_coins_info(coins[-1:])
+        largest_coin = max(coins, key=lambda x: x.value_sats())
+        assert not psman.new_collateral_from_coins_info([largest_coin])
         wfl, err = psman.create_new_collateral_wfl_from_gui(coins, None)
         assert err
         assert not wfl
@@ -1700,8 +1785,7 @@ class PSWalletTestCase(TestCaseForTestnet):
                             confirmed_funding_only=True,
                             consider_islocks=True, min_rounds=0)
         coins = [c for c in coins if c.value_sats() == MIN_DENOM_VAL]
-        coins = sorted(coins, key=lambda x: x.ps_rounds)
-        coins = coins[0:1]
+        coins = [min(coins, key=lambda x: x.ps_rounds)]
         assert psman.new_collateral_from_coins_info(coins) == \
             ('Transactions type: PS New Collateral\n'
              'Count of transactions: 1\n'
@@ -1710,18 +1794,16 @@ class PSWalletTestCase(TestCaseForTestnet):
              'Total fee: 10001')
 
         # check not created if mixing
-        psman.state = PSStates.Mixing
-        wfl, err = psman.create_new_collateral_wfl_from_gui(coins, None)
-        assert err
-        assert not wfl
-        psman.state = PSStates.Ready
+        with mixing_state(psman):
+            wfl, err = psman.create_new_collateral_wfl_from_gui(coins, None)
+            assert err
+            assert not wfl
 
         # check created on minimal denom
         wfl, err = psman.create_new_collateral_wfl_from_gui(coins, None)
         assert not err
         txid = wfl.tx_order[0]
-        raw_tx = wfl.tx_data[txid].raw_tx
-        tx = Transaction(raw_tx)
+        tx = self.get_wfl_tx(wfl, txid)
         inputs = tx.inputs()
         outputs = tx.outputs()
         assert len(inputs) == 1
@@ -1741,31 +1823,27 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         assert psman.new_collateral_wfl
         for txid in wfl.tx_order:
-            tx = Transaction(wfl.tx_data[txid].raw_tx)
+            tx = self.get_wfl_tx(wfl, txid)
             psman._process_by_new_collateral_wfl(txid, tx)
         assert not psman.new_collateral_wfl
 
+    @with_found_ps_txs
     def test_cleanup_new_collateral_wfl(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
         c_outpoint, ps_collateral = w.db.get_ps_collateral()
         w.db.pop_ps_collateral(c_outpoint)
 
         # check if new_collateral_wfl is empty
         assert not psman.new_collateral_wfl
-        coro = psman.cleanup_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_new_collateral_wfl())
         assert not psman.new_collateral_wfl
 
         # check no cleanup if completed and tx_order is not empty
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_collateral_wfl())
         assert psman.new_collateral_wfl
-        coro = psman.cleanup_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_new_collateral_wfl())
         assert psman.new_collateral_wfl
 
         # check cleanup if not completed and tx_order is not empty
@@ -1777,8 +1855,7 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         wfl.completed = False
         psman.set_new_collateral_wfl(wfl)
-        coro = psman.cleanup_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_new_collateral_wfl())
 
         assert not psman.new_collateral_wfl
         reserved = w.db.select_ps_reserved(data=wfl.uuid)
@@ -1788,95 +1865,89 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert w.db.get_transaction(txid) is None
         assert not psman.new_collateral_wfl
 
-        # check cleaned up with force
-        assert not psman.new_collateral_wfl
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        assert psman.new_collateral_wfl
-        coro = psman.cleanup_new_collateral_wfl(force=True)
-        asyncio.get_event_loop().run_until_complete(coro)
-        assert not psman.new_collateral_wfl
-
-        # check cleaned up when all txs removed
-        assert not psman.new_collateral_wfl
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        assert psman.new_collateral_wfl
-        txid = psman.new_collateral_wfl.tx_order[0]
-        w.remove_transaction(txid)
-        assert not psman.new_collateral_wfl
-
+        # both checks use the single new_collateral_wfl slot of psman,
+        # so they can not run concurrently, but share one loop run
+        async def cleanup_steps():
+            # check cleaned up with force
+            assert not psman.new_collateral_wfl
+            await psman.create_new_collateral_wfl()
+            assert psman.new_collateral_wfl
+            await psman.cleanup_new_collateral_wfl(force=True)
+            assert not psman.new_collateral_wfl
+
+            # check cleaned up when all txs removed
+            assert not psman.new_collateral_wfl
+            await psman.create_new_collateral_wfl()
+            assert psman.new_collateral_wfl
+            txid = psman.new_collateral_wfl.tx_order[0]
+            w.remove_transaction(txid)
+            assert not psman.new_collateral_wfl
+        self.run_coro(cleanup_steps())
+
+    @with_found_ps_txs
     def test_broadcast_new_collateral_wfl(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
         c_outpoint, ps_collateral = w.db.get_ps_collateral()
         w.db.pop_ps_collateral(c_outpoint)
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_collateral_wfl())
         wfl = psman.new_collateral_wfl
         assert wfl.completed
 
-        # check not broadcasted (no network)
-        assert wfl.next_to_send(w) is not None
-        coro = psman.broadcast_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        wfl = psman.new_collateral_wfl
-        assert wfl.next_to_send(w) is not None
-
-        # check not broadcasted (mock network method raises)
-        assert wfl.next_to_send(w) is not None
-        psman.network = NetworkBroadcastMock(pass_cnt=0)
-        coro = psman.broadcast_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        wfl = psman.new_collateral_wfl
-        assert wfl.next_to_send(w) is not None
+        async def broadcast_steps():
+            # check not broadcasted (no network)
+            wfl = psman.new_collateral_wfl
+            assert wfl.next_to_send(w) is not None
+            await psman.broadcast_new_collateral_wfl()
+            wfl = psman.new_collateral_wfl
+            assert wfl.next_to_send(w) is not None
+
+            # check not broadcasted (mock network method raises)
+            psman.network = NetworkBroadcastMock(pass_cnt=0)
+            await psman.broadcast_new_collateral_wfl()
+            wfl = psman.new_collateral_wfl
+            assert wfl.next_to_send(w) is not None
+
+            # check not broadcasted (skipped) if tx in wallet.unverified_tx
+            txid = wfl.tx_order[0]
+            w.add_unverified_tx(txid, TX_HEIGHT_UNCONF_PARENT)
+            assert wfl.next_to_send(w) is None
+            psman.network = NetworkBroadcastMock()
+            await psman.broadcast_new_collateral_wfl()
+            wfl = psman.new_collateral_wfl
+            assert wfl.next_to_send(w) is None
+            w.unverified_tx.pop(txid)
 
-        # check not broadcasted (skipped) if tx is in wallet.unverified_tx
-        assert wfl.next_to_send(w) is not None
-        txid = wfl.tx_order[0]
-        w.add_unverified_tx(txid, TX_HEIGHT_UNCONF_PARENT)
-        assert wfl.next_to_send(w) is None
-        psman.network = NetworkBroadcastMock()
-        coro = psman.broadcast_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        wfl = psman.new_collateral_wfl
-        assert wfl.next_to_send(w) is None
-        w.unverified_tx.pop(txid)
+            # check not broadcasted (mock network) but recently send failed
+            assert wfl.next_to_send(w) is not None
+            psman.network = NetworkBroadcastMock()
+            await psman.broadcast_new_collateral_wfl()
+            wfl = psman.new_collateral_wfl
 
-        # check not broadcasted (mock network) but recently send failed
-        assert wfl.next_to_send(w) is not None
-        psman.network = NetworkBroadcastMock()
-        coro = psman.broadcast_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        wfl = psman.new_collateral_wfl
-        assert wfl.next_to_send(w) is not None
+            # check broadcasted (mock network)
+            tx_data = wfl.next_to_send(w)
+            assert tx_data is not None
+            tx_data.next_send = None
+            psman.set_new_collateral_wfl(wfl)
+            await psman.broadcast_new_collateral_wfl()
+            assert psman.new_collateral_wfl
 
-        # check broadcasted (mock network)
-        assert wfl.next_to_send(w) is not None
-        tx_data = wfl.next_to_send(w)
-        tx_data.next_send = None
-        psman.set_new_collateral_wfl(wfl)
-        coro = psman.broadcast_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        assert psman.new_collateral_wfl
+        # all broadcast steps are run by one event loop run
+        self.run_coro(broadcast_steps())
 
+    @with_found_ps_txs
     def test_process_by_new_collateral_wfl(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
         c_outpoint, ps_collateral = w.db.get_ps_collateral()
         w.db.pop_ps_collateral(c_outpoint)
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_collateral_wfl())
 
         wfl = psman.new_collateral_wfl
         txid = wfl.tx_order[0]
-        tx = Transaction(wfl.tx_data[txid].raw_tx)
+        tx = self.get_wfl_tx(wfl, txid)
         w.add_unverified_tx(txid, TX_HEIGHT_UNCONFIRMED)
         psman._process_by_new_collateral_wfl(txid, tx)
         assert not psman.new_collateral_wfl
@@ -1887,9 +1958,8 @@ class PSWalletTestCase(TestCaseForTestnet):
         new_c_outpoint, new_collateral = w.db.get_ps_collateral()
         tx = w.db.get_transaction(txid)
         out0 = tx.outputs()[0]
-        assert new_collateral[0] == out0.address
-        assert new_collateral[1] == out0.value
-        assert new_c_outpoint == f'{txid}:0'
+        assert ((new_c_outpoint, tuple(new_collateral))
+                == (f'{txid}:0', (out0.address, out0.value)))
         assert w.db.get_ps_tx(txid) == (PSTxTypes.NEW_COLLATERAL, True)
 
     def test_find_denoms_approx_def(self):
@@ -1933,16 +2003,24 @@ class PSWalletTestCase(TestCaseForTestnet):
         ]
         w = self.wallet
         psman = w.psman
-        res = psman.calc_need_denoms_amounts()
-        assert res == all_test_amounts
-        res = psman.calc_need_denoms_amounts(use_cache=True)
-        assert res == all_test_amounts
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
-        res = psman.calc_need_denoms_amounts()
-        assert res == []
-        res = psman.calc_need_denoms_amounts(use_cache=True)
-        assert res == []
+        with mock.patch.object(w, 'get_balance',
+                               wraps=w.get_balance) as get_balance:
+            res = psman.calc_need_denoms_amounts()
+            assert res == all_test_amounts
+            assert get_balance.call_count == 1
+            # denoms value is taken from cache, not from wallet balance
+            res = psman.calc_need_denoms_amounts(use_cache=True)
+            assert res == all_test_amounts
+            assert get_balance.call_count == 1
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
+        with mock.patch.object(w, 'get_balance',
+                               wraps=w.get_balance) as get_balance:
+            res = psman.calc_need_denoms_amounts()
+            assert res == []
+            assert get_balance.call_count == 1
+            res = psman.calc_need_denoms_amounts(use_cache=True)
+            assert res == []
+            assert get_balance.call_count == 1
 
     def test_calc_need_denoms_amounts_from_coins(self):
         w = self.wallet
@@ -1952,116 +2030,71 @@ class PSWalletTestCase(TestCaseForTestnet):
         dv001 = PS_DENOMS_VALS[1]
         dv01 = PS_DENOMS_VALS[2]
         dv1 = PS_DENOMS_VALS[3]
-        coins = w.get_spendable_coins(domain=None)
-        c0001 = list(filter(lambda x: x.value_sats() == dv0001, coins))
-        c001 = list(filter(lambda x: x.value_sats() == dv001, coins))
-        c01 = list(filter(lambda x: x.value_sats() == dv01, coins))
-        c1 = list(filter(lambda x: x.value_sats() == dv1, coins))
-        other = list(filter(lambda x: x.value_sats() not in PS_DENOMS_VALS,
-                            coins))
+        coins_by_val = defaultdict(list)
+        other = []
+        for c in w.get_spendable_coins(domain=None):
+            val = c.value_sats()
+            if val in PS_DENOMS_DICT:
+                coins_by_val[val].append(c)
+            else:
+                other.append(c)
+        c0001 = coins_by_val[dv0001]
+        c001 = coins_by_val[dv001]
+        c01 = coins_by_val[dv01]
+        c1 = coins_by_val[dv1]
         ccv = COLLATERAL_VAL*9
         assert len(c1) == 2
         assert len(c01) == 26
         assert len(c001) == 33
         assert len(c0001) == 70
 
-        assert psman.calc_need_denoms_amounts(coins=c0001[0:1]) == []
-
-        expected = [[ccv] + [dv0001]]
-        assert psman.calc_need_denoms_amounts(coins=c0001[0:2]) == expected
-
-        expected = [[ccv] + [dv0001]*2]
-        assert psman.calc_need_denoms_amounts(coins=c0001[0:3]) == expected
-
-        expected = [[ccv] + [dv0001]*3]
-        assert psman.calc_need_denoms_amounts(coins=c0001[0:4]) == expected
-
-        expected = [[ccv] + [dv0001]*4]
-        assert psman.calc_need_denoms_amounts(coins=c0001[0:5]) == expected
-
-        expected = [[ccv] + [dv0001]*5]
-        assert psman.calc_need_denoms_amounts(coins=c0001[0:6]) == expected
-
-        expected = [[ccv] + [dv0001]*6]
-        assert psman.calc_need_denoms_amounts(coins=c0001[0:7]) == expected
-
-        expected = [[ccv] + [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c0001[0:8]) == expected
-
-
-        expected = [[ccv] + [dv0001]*9]
-        assert psman.calc_need_denoms_amounts(coins=c001[0:1]) == expected
-
-        expected = [[ccv] + [dv0001]*11, [dv0001]*8]
-        assert psman.calc_need_denoms_amounts(coins=c001[0:2]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001], [dv0001]*8]
-        assert psman.calc_need_denoms_amounts(coins=c001[0:3]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*2, [dv0001]*8]
-        assert psman.calc_need_denoms_amounts(coins=c001[0:4]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*3, [dv0001]*8]
-        assert psman.calc_need_denoms_amounts(coins=c001[0:5]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*4, [dv0001]*8]
-        assert psman.calc_need_denoms_amounts(coins=c001[0:6]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*5, [dv0001]*8]
-        assert psman.calc_need_denoms_amounts(coins=c001[0:7]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*6, [dv0001]*8]
-        assert psman.calc_need_denoms_amounts(coins=c001[0:8]) == expected
-
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*8, [dv0001]*8]
-        assert psman.calc_need_denoms_amounts(coins=c01[0:1]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11,
-                    [dv0001]*11 + [dv001]*6, [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c01[0:2]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01],
-                    [dv0001]*11 + [dv001]*6, [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c01[0:3]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*2,
-                    [dv0001]*11 + [dv001]*6, [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c01[0:4]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*3,
-                    [dv0001]*11 + [dv001]*6, [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c01[0:5]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*4,
-                    [dv0001]*11 + [dv001]*6, [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c01[0:6]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*5,
-                    [dv0001]*11 + [dv001]*6, [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c01[0:7]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*6,
-                    [dv0001]*11 + [dv001]*6, [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c01[0:8]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*7,
-                    [dv0001]*11 + [dv001]*6, [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c01[0:9]) == expected
-
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*8,
-                    [dv0001]*11 + [dv001]*6, [dv0001]*7]
-        assert psman.calc_need_denoms_amounts(coins=c1[0:1]) == expected
-
-        expected = [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*11,
-                    [dv0001]*11 + [dv001]*11 + [dv01]*6,
-                    [dv0001]*11 + [dv001]*4, [dv0001]*6]
-        assert psman.calc_need_denoms_amounts(coins=c1[0:2]) == expected
-
-        expected = [[10000] + [dv0001]*11 + [dv001]*11 + [dv01]*11 + [dv1]*8,
-                    [dv0001]*11 + [dv001]*11 + [dv01]*5, [dv0001]*6]
-        assert psman.calc_need_denoms_amounts(coins=other) == expected
+        # (coins, expected need denoms amounts)
+        test_data = [
+            (c0001[0:1], []),
+            (c0001[0:2], [[ccv] + [dv0001]]),
+            (c0001[0:3], [[ccv] + [dv0001]*2]),
+            (c0001[0:4], [[ccv] + [dv0001]*3]),
+            (c0001[0:5], [[ccv] + [dv0001]*4]),
+            (c0001[0:6], [[ccv] + [dv0001]*5]),
+            (c0001[0:7], [[ccv] + [dv0001]*6]),
+            (c0001[0:8], [[ccv] + [dv0001]*7]),
+            (c001[0:1], [[ccv] + [dv0001]*9]),
+            (c001[0:2], [[ccv] + [dv0001]*11, [dv0001]*8]),
+            (c001[0:3], [[ccv] + [dv0001]*11 + [dv001], [dv0001]*8]),
+            (c001[0:4], [[ccv] + [dv0001]*11 + [dv001]*2, [dv0001]*8]),
+            (c001[0:5], [[ccv] + [dv0001]*11 + [dv001]*3, [dv0001]*8]),
+            (c001[0:6], [[ccv] + [dv0001]*11 + [dv001]*4, [dv0001]*8]),
+            (c001[0:7], [[ccv] + [dv0001]*11 + [dv001]*5, [dv0001]*8]),
+            (c001[0:8], [[ccv] + [dv0001]*11 + [dv001]*6, [dv0001]*8]),
+            (c01[0:1], [[ccv] + [dv0001]*11 + [dv001]*8, [dv0001]*8]),
+            (c01[0:2], [[ccv] + [dv0001]*11 + [dv001]*11,
+                        [dv0001]*11 + [dv001]*6, [dv0001]*7]),
+            (c01[0:3], [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01],
+                        [dv0001]*11 + [dv001]*6, [dv0001]*7]),
+            (c01[0:4], [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*2,
+                        [dv0001]*11 + [dv001]*6, [dv0001]*7]),
+            (c01[0:5], [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*3,
+                        [dv0001]*11 + [dv001]*6, [dv0001]*7]),
+            (c01[0:6], [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*4,
+                        [dv0001]*11 + [dv001]*6, [dv0001]*7]),
+            (c01[0:7], [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*5,
+                        [dv0001]*11 + [dv001]*6, [dv0001]*7]),
+            (c01[0:8], [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*6,
+                        [dv0001]*11 + [dv001]*6, [dv0001]*7]),
+            (c01[0:9], [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*7,
+                        [dv0001]*11 + [dv001]*6, [dv0001]*7]),
+            (c1[0:1], [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*8,
+                       [dv0001]*11 + [dv001]*6, [dv0001]*7]),
+            (c1[0:2], [[ccv] + [dv0001]*11 + [dv001]*11 + [dv01]*11,
+                       [dv0001]*11 + [dv001]*11 + [dv01]*6,
+                       [dv0001]*11 + [dv001]*4, [dv0001]*6]),
+            (other, [[10000] + [dv0001]*11 + [dv001]*11 + [dv01]*11 + [dv1]*8,
+                     [dv0001]*11 + [dv001]*11 + [dv01]*5, [dv0001]*6]),
+        ]
+        for i, (coins, expected) in enumerate(test_data):
+            with self.subTest(i=i):
+                res = psman.calc_need_denoms_amounts(coins=coins)
+                assert res == expected
 
     def test_calc_need_denoms_amounts_on_keep_amount(self):
         w = self.wallet
@@ -2069,28 +2102,23 @@ class PSWalletTestCase(TestCaseForTestnet):
         two_dash_amnts_val = 200142001
 
         res = psman.calc_need_denoms_amounts()
-        assert sum([sum(amnts)for amnts in res]) == two_dash_amnts_val
+        assert sum(sum(amnts) for amnts in res) == two_dash_amnts_val
         res = psman.calc_need_denoms_amounts(on_keep_amount=True)
-        assert sum([sum(amnts)for amnts in res]) == two_dash_amnts_val
+        assert sum(sum(amnts) for amnts in res) == two_dash_amnts_val
 
         # test with spendable amount < keep_amount
         coins0 = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
                              mature_only=True, include_ps=True)
-        coins = [c for c in coins0 if c.value_sats() < 50000000]
-        coins_str = {c.prevout.to_str() for c in coins}
-        w.set_frozen_state_of_coins(coins_str, True)
-        coins = [c for c in coins0 if c.value_sats() >= 100000000]
-        coins_str = {c.prevout.to_str() for c in coins}
+        coins_str = {c.prevout.to_str() for c in coins0
+                     if not 50000000 <= c.value_sats() < 100000000}
         w.set_frozen_state_of_coins(coins_str, True)
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True, include_ps=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c)]
-        assert sum([c.value_sats() for c in coins]) == 50000000  # 0.5 Dash
+        coins = [c for c in coins0 if not w.is_frozen_coin(c)]
+        assert sum(c.value_sats() for c in coins) == 50000000  # 0.5 Dash
 
         res = psman.calc_need_denoms_amounts()
-        assert sum([sum(amnts)for amnts in res]) == 49740497
+        assert sum(sum(amnts) for amnts in res) == 49740497
         res = psman.calc_need_denoms_amounts(on_keep_amount=True)
-        assert sum([sum(amnts)for amnts in res]) == two_dash_amnts_val
+        assert sum(sum(amnts) for amnts in res) == two_dash_amnts_val
 
         # test with zero spendable amount
         coins_str = {c.prevout.to_str() for c in coins}
@@ -2098,9 +2126,9 @@ class PSWalletTestCase(TestCaseForTestnet):
         coins = [c for c in coins if not w.is_frozen_coin(c)]
 
         res = psman.calc_need_denoms_amounts()
-        assert sum([sum(amnts)for amnts in res]) == 0
+        assert sum(sum(amnts) for amnts in res) == 0
         res = psman.calc_need_denoms_amounts(on_keep_amount=True)
-        assert sum([sum(amnts)for amnts in res]) == two_dash_amnts_val
+        assert sum(sum(amnts) for amnts in res) == two_dash_amnts_val
 
     def test_calc_need_denoms_amounts_on_abs_cnt(self):
         w = self.wallet
@@ -2119,10 +2147,9 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert psman.keep_amount == 12.300123
         res = psman.calc_need_denoms_amounts()
         total_val = sum(v for amnts in res for v in amnts)
-        cnt = Counter(res[0])
-        assert cnt[PS_DENOMS_VALS[2]] == 3
-        assert cnt[PS_DENOMS_VALS[3]] == 2
-        assert cnt[PS_DENOMS_VALS[4]] == 1
+        assert res[0].count(PS_DENOMS_VALS[2]) == 3
+        assert res[0].count(PS_DENOMS_VALS[3]) == 2
+        assert res[0].count(PS_DENOMS_VALS[4]) == 1
         assert total_val - 40000 == psman.keep_amount*COIN
 
         # check with on_keep_amount=True
@@ -2136,8 +2163,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert coins_data['total_val'] < psman.keep_amount*COIN
 
         # find untracked ps data
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
 
         abs_cnt[PS_DENOMS_VALS[4]] = 1
         psman.abs_denoms_cnt = abs_cnt
@@ -2159,46 +2185,19 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert total_val == 1000010000
 
     def test_calc_tx_size(self):
-        # average sizes
-        assert 192 == calc_tx_size(1, 1)
-        assert 226 == calc_tx_size(1, 2)
-        assert 37786 == calc_tx_size(255, 1)
-        assert 8830 == calc_tx_size(1, 255)
-        assert 46424 == calc_tx_size(255, 255)
-        assert 148046 == calc_tx_size(1000, 1)
-        assert 34160 == calc_tx_size(1, 1000)
-        assert 182014 == calc_tx_size(1000, 1000)
-
-        # max sizes
-        assert 193 == calc_tx_size(1, 1, max_size=True)
-        assert 227 == calc_tx_size(1, 2, max_size=True)
-        assert 38041 == calc_tx_size(255, 1, max_size=True)
-        assert 8831 == calc_tx_size(1, 255, max_size=True)
-        assert 46679 == calc_tx_size(255, 255, max_size=True)
-        assert 149046 == calc_tx_size(1000, 1, max_size=True)
-        assert 34161 == calc_tx_size(1, 1000, max_size=True)
-        assert 183014 == calc_tx_size(1000, 1000, max_size=True)
+        for in_cnt, out_cnt, max_size, size in CALC_TX_SIZE_TEST_DATA:
+            with self.subTest(in_cnt=in_cnt, out_cnt=out_cnt,
+                              max_size=max_size):
+                assert size == calc_tx_size(in_cnt, out_cnt,
+                                            max_size=max_size)
 
     def test_calc_tx_fee(self):
-        # average sizes
-        assert 192 == calc_tx_fee(1, 1, 1000)
-        assert 226 == calc_tx_fee(1, 2, 1000)
-        assert 37786 == calc_tx_fee(255, 1, 1000)
-        assert 8830 == calc_tx_fee(1, 255, 1000)
-        assert 46424 == calc_tx_fee(255, 255, 1000)
-        assert 148046 == calc_tx_fee(1000, 1, 1000)
-        assert 34160 == calc_tx_fee(1, 1000, 1000)
-        assert 182014 == calc_tx_fee(1000, 1000, 1000)
-
-        # max sizes
-        assert 193 == calc_tx_fee(1, 1, 1000, max_size=True)
-        assert 227 == calc_tx_fee(1, 2, 1000, max_size=True)
-        assert 38041 == calc_tx_fee(255, 1, 1000, max_size=True)
-        assert 8831 == calc_tx_fee(1, 255, 1000, max_size=True)
-        assert 46679 == calc_tx_fee(255, 255, 1000, max_size=True)
-        assert 149046 == calc_tx_fee(1000, 1, 1000, max_size=True)
-        assert 34161 == calc_tx_fee(1, 1000, 1000, max_size=True)
-        assert 183014 == calc_tx_fee(1000, 1000, 1000, max_size=True)
+        # with fee_per_kb=1000 fee is equal to tx size
+        for in_cnt, out_cnt, max_size, size in CALC_TX_SIZE_TEST_DATA:
+            with self.subTest(in_cnt=in_cnt, out_cnt=out_cnt,
+                              max_size=max_size):
+                assert size == calc_tx_fee(in_cnt, out_cnt, 1000,
+                                           max_size=max_size)
 
     def test_get_next_coins_for_mixing(self):
         w = self.wallet
@@ -2209,8 +2208,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         now = time.time()
         psman.last_denoms_tx_time = now
 
-        coro = psman.get_next_coins_for_mixing()
-        coins = asyncio.get_event_loop().run_until_complete(coro)
+        coins = self.run_coro(psman.get_next_coins_for_mixing())
         assert time.time() - now < 1
         total_val = coins['total_val']
         assert total_val == 1484831773
@@ -2221,8 +2219,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         coins_str = {c.prevout.to_str() for c in coins}
         w.set_frozen_state_of_coins(coins_str, True)
 
-        coro = psman.get_next_coins_for_mixing()
-        coins = asyncio.get_event_loop().run_until_complete(coro)
+        coins = self.run_coro(psman.get_next_coins_for_mixing())
         total_val = coins['total_val']
         assert total_val == 0
         coins = coins['coins']
@@ -2239,10 +2236,18 @@ class PSWalletTestCase(TestCaseForTestnet):
         now = time.time()
         psman.last_denoms_tx_time = now
 
-        coro = psman.get_next_coins_for_mixing()
-        coins = asyncio.get_event_loop().run_until_complete(coro)
-        assert time.time() - now > 3.0
-        assert time.time() - now < 4.0
+        # fake clock advanced by sleeps instead of waiting for real
+        clock = [now]
+
+        async def fake_sleep(delay):
+            clock[0] += delay
+
+        with mock.patch('electrum_dash.dash_ps_wallet.time') as time_mock, \
+                mock.patch('asyncio.sleep', fake_sleep):
+            time_mock.time.side_effect = lambda: clock[0]
+            coins = self.run_coro(psman.get_next_coins_for_mixing())
+        assert clock[0] - now >= 3.0
+        assert clock[0] - now < 4.0
         total_val = coins['total_val']
         assert total_val == 802806773
         coins = coins['coins']
@@ -2254,45 +2259,42 @@ class PSWalletTestCase(TestCaseForTestnet):
         coins_str = {c.prevout.to_str() for c in coins}
         w.set_frozen_state_of_coins(coins_str, True)
 
-        coro = psman.get_next_coins_for_mixing()
-        coins = asyncio.get_event_loop().run_until_complete(coro)
+        # last new denoms tx is older than delay, next calls do not wait
+        psman.last_denoms_tx_time = time.time() - 4
+        now = time.time()
+        coins = self.run_coro(psman.get_next_coins_for_mixing())
+        assert time.time() - now < 1
         total_val = coins['total_val']
         assert total_val == 100001000
         coins = coins['coins']
         assert len(coins) == 1
         assert coins[0].value_sats() == total_val
 
-
         # check coins filtered by calc_need_denoms_amounts
-        coins = w.get_utxos(None)
-        coins = [c for c in coins
-                 if c.value_sats() in [100001000, 100000000, 50000000,
-                                       30000000, 10000100, 2000000]]
-        coins_str = {c.prevout.to_str() for c in coins}
+        utxos = w.get_utxos(None)
+        coins_str = {c.prevout.to_str() for c in utxos
+                     if c.value_sats() in {100001000, 100000000, 50000000,
+                                           30000000, 10000100, 2000000}}
         w.set_frozen_state_of_coins(coins_str, True)
 
-        coro = psman.get_next_coins_for_mixing()
-        coins = asyncio.get_event_loop().run_until_complete(coro)
+        coins = self.run_coro(psman.get_next_coins_for_mixing())
         total_val = coins['total_val']
         assert total_val == 1000010
         coins = coins['coins']
         assert len(coins) == 1
 
         w.db.set_ps_data('mix_rounds', 500)  # high rounds to check skip coins
-        coro = psman.get_next_coins_for_mixing()
-        coins = asyncio.get_event_loop().run_until_complete(coro)
+        coins = self.run_coro(psman.get_next_coins_for_mixing())
         total_val = coins['total_val']
         assert total_val == 0
         coins = coins['coins']
         assert len(coins) == 0
 
-        # freeze all to test coins absence
-        coins = w.get_utxos(None)
-        coins_str = {c.prevout.to_str() for c in coins}
+        # freeze all to test coins absence (no txs added since utxos read)
+        coins_str = {c.prevout.to_str() for c in utxos}
         w.set_frozen_state_of_coins(coins_str, True)
 
-        coro = psman.get_next_coins_for_mixing()
-        coins = asyncio.get_event_loop().run_until_complete(coro)
+        coins = self.run_coro(psman.get_next_coins_for_mixing())
         total_val = coins['total_val']
         assert total_val == 0
         coins = coins['coins']
@@ -2306,14 +2308,12 @@ class PSWalletTestCase(TestCaseForTestnet):
         # check not created if new_denoms_wfl is not empty
         wfl = PSTxWorkflow(uuid='uuid')
         psman.set_new_denoms_wfl(wfl)
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         assert psman.new_denoms_wfl == wfl
         psman.clear_new_denoms_wfl()
 
         # check created successfully
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         assert wfl.completed
         all_test_amounts = [
@@ -2324,37 +2324,28 @@ class PSWalletTestCase(TestCaseForTestnet):
         ]
         for i, txid in enumerate(wfl.tx_order):
             tx = w.db.get_transaction(txid)
-            collaterals_count = 0
-            denoms_count = 0
-            change_count = 0
-            for o in tx.outputs():
-                val = o.value
-                if val == CREATE_COLLATERAL_VAL:
-                    collaterals_count += 1
-                elif val in PS_DENOMS_VALS:
-                    assert all_test_amounts[i][denoms_count] == val
-                    denoms_count += 1
-                else:
-                    change_count += 1
+            out_vals = [o.value for o in tx.outputs()]
+            denoms_vals = [v for v in out_vals if v in PS_DENOMS_DICT]
+            collaterals_count = out_vals.count(CREATE_COLLATERAL_VAL)
+            change_count = (len(out_vals) - len(denoms_vals)
+                            - collaterals_count)
             if i == 0:
                 assert collaterals_count == 1
             else:
                 assert collaterals_count == 0
-            assert denoms_count == len(all_test_amounts[i])
+            assert denoms_vals == all_test_amounts[i]
             assert change_count == 1
         assert len(w.db.select_ps_reserved(data=wfl.uuid)) == 85
 
         wfl.completed = False
         psman.set_new_denoms_wfl(wfl)
-        coro = psman.cleanup_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_new_denoms_wfl())
         outpoint0 = '0'*64 + ':0'
         w.db.add_ps_collateral(outpoint0, (w.dummy_address(), 1))
         assert not psman.new_denoms_wfl
 
         # check created successfully without ps_collateral output
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         assert wfl.completed
         all_test_amounts = [
@@ -2365,20 +2356,13 @@ class PSWalletTestCase(TestCaseForTestnet):
         ]
         for i, txid in enumerate(wfl.tx_order):
             tx = w.db.get_transaction(txid)
-            collaterals_count = 0
-            denoms_count = 0
-            change_count = 0
-            for o in tx.outputs():
-                val = o.value
-                if val == CREATE_COLLATERAL_VAL:
-                    collaterals_count += 1
-                elif val in PS_DENOMS_VALS:
-                    assert all_test_amounts[i][denoms_count] == val
-                    denoms_count += 1
-                else:
-                    change_count += 1
+            out_vals = [o.value for o in tx.outputs()]
+            denoms_vals = [v for v in out_vals if v in PS_DENOMS_DICT]
+            collaterals_count = out_vals.count(CREATE_COLLATERAL_VAL)
+            change_count = (len(out_vals) - len(denoms_vals)
+                            - collaterals_count)
             assert collaterals_count == 0
-            assert denoms_count == len(all_test_amounts[i])
+            assert denoms_vals == all_test_amounts[i]
             assert change_count == 1
         assert len(w.db.select_ps_reserved(data=wfl.uuid)) == 84
 
@@ -2386,29 +2370,24 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.keep_amount = 5
         wfl.completed = False
         psman.set_new_denoms_wfl(wfl)
-        coro = psman.cleanup_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_new_denoms_wfl())
         w.db.pop_ps_collateral(outpoint0)
         psman.state = PSStates.Ready
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
         psman.state = PSStates.Mixing
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         assert not psman.new_denoms_wfl
 
+    @with_found_ps_txs
     def test_create_new_denoms_wfl_low_balance(self):
         w = self.wallet
         psman = w.psman
         psman.keep_amount = 1000
         fee_per_kb = self.config.fee_per_kb()
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
 
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         assert wfl.completed
 
@@ -2421,6 +2400,7 @@ class PSWalletTestCase(TestCaseForTestnet):
                 CREATE_COLLATERAL_VAL * new_collateral_cnt -
                 new_collateral_fee * new_collateral_cnt) < half_minimal_denom
 
+    @with_found_ps_txs
     def test_create_new_denoms_wfl_low_balance_group_origin_by_addr(self):
         w = self.wallet
         psman = w.psman
@@ -2428,21 +2408,18 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.keep_amount = 1000
         fee_per_kb = self.config.fee_per_kb()
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
 
         # freeze coins except smallest
-        coins = sorted(w.get_utxos(), key=lambda x: -x.value_sats())[:-1]
-        coins_str = {c.prevout.to_str() for c in coins}
+        coins = w.get_utxos()
+        smallest = min(coins, key=lambda x: x.value_sats())
+        coins_str = {c.prevout.to_str() for c in coins if c is not smallest}
         w.set_frozen_state_of_coins(coins_str, True)
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses)
-        coins = [c for c in coins if not w.is_frozen_coin(c)]
+        coins = spendable_coins(w)
         assert len(coins) == 1
         assert coins[0].value_sats() == 1000000
 
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         assert wfl.completed
 
@@ -2450,22 +2427,19 @@ class PSWalletTestCase(TestCaseForTestnet):
         new_collateral_cnt = 19
         new_collateral_fee = calc_tx_fee(1, 2, fee_per_kb, max_size=True)
         half_minimal_denom = MIN_DENOM_VAL // 2
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses)
-        coins = [c for c in coins if not w.is_frozen_coin(c)]
+        coins = spendable_coins(w)
         assert len(coins) == 1
         assert (coins[0].value_sats() -
                 CREATE_COLLATERAL_VAL * new_collateral_cnt -
                 new_collateral_fee * new_collateral_cnt) < half_minimal_denom
 
+    @with_found_ps_txs
     def test_create_new_denoms_wfl_from_gui(self):
         w = self.wallet
         psman = w.psman
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
-
         coins = w.get_spendable_coins(domain=None)
-        coins = sorted([c for c in coins], key=lambda x: x.value_sats())
+        coins = sorted(coins, key=lambda x: x.value_sats())
         # check selected to many utxos
         assert not psman.new_denoms_from_coins_info(coins)
         wfl, err = psman.create_new_denoms_wfl_from_gui(coins, None)
@@ -2476,17 +2450,15 @@ class PSWalletTestCase(TestCaseForTestnet):
                             confirmed_funding_only=True,
                             consider_islocks=True, min_rounds=0)
         coins = [c for c in coins if c.value_sats() == PS_DENOMS_VALS[-2]]
-        coins = sorted(coins, key=lambda x: x.ps_rounds)
 
         # check on single max value available denom
-        coins = coins[0:1]
+        coins = [min(coins, key=lambda x: x.ps_rounds)]
 
         # check not created if mixing
-        psman.state = PSStates.Mixing
-        wfl, err = psman.create_new_denoms_wfl_from_gui(coins, None)
-        assert err
-        assert not wfl
-        psman.state = PSStates.Ready
+        with mixing_state(psman):
+            wfl, err = psman.create_new_denoms_wfl_from_gui(coins, None)
+            assert err
+            assert not wfl
 
         # check on 100001000 denom
         assert psman.new_denoms_from_coins_info(coins) == \
@@ -2499,8 +2471,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         wfl, err = psman.create_new_denoms_wfl_from_gui(coins, None)
         assert not err
         txid = wfl.tx_order[0]
-        raw_tx = wfl.tx_data[txid].raw_tx
-        tx = Transaction(raw_tx)
+        tx = self.get_wfl_tx(wfl, txid)
         inputs = tx.inputs()
         outputs = tx.outputs()
         assert len(inputs) == 1
@@ -2523,8 +2494,7 @@ class PSWalletTestCase(TestCaseForTestnet):
                             10000100, 10000100, 10000100, 10000100, 10000100]
 
         txid = wfl.tx_order[1]
-        raw_tx = wfl.tx_data[txid].raw_tx
-        tx = Transaction(raw_tx)
+        tx = self.get_wfl_tx(wfl, txid)
         inputs = tx.inputs()
         outputs = tx.outputs()
         out_vals = [o.value for o in outputs]
@@ -2535,8 +2505,7 @@ class PSWalletTestCase(TestCaseForTestnet):
                             1000010]
 
         txid = wfl.tx_order[2]
-        raw_tx = wfl.tx_data[txid].raw_tx
-        tx = Transaction(raw_tx)
+        tx = self.get_wfl_tx(wfl, txid)
         inputs = tx.inputs()
         outputs = tx.outputs()
         out_vals = [o.value for o in outputs]
@@ -2552,7 +2521,7 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         # process
         for txid in wfl.tx_order:
-            tx = Transaction(wfl.tx_data[txid].raw_tx)
+            tx = self.get_wfl_tx(wfl, txid)
             psman._process_by_new_denoms_wfl(txid, tx)
         assert not psman.new_denoms_wfl
 
@@ -2562,8 +2531,7 @@ class PSWalletTestCase(TestCaseForTestnet):
                             confirmed_funding_only=True,
                             consider_islocks=True, min_rounds=0)
         coins = [c for c in coins if c.value_sats() == PS_DENOMS_VALS[-3]]
-        coins = sorted(coins, key=lambda x: x.ps_rounds)
-        coins = coins[0:1]
+        coins = [min(coins, key=lambda x: x.ps_rounds)]
         assert psman.new_denoms_from_coins_info(coins) == \
             ('Transactions type: PS New Denoms\n'
              'Count of transactions: 2\n'
@@ -2572,8 +2540,7 @@ class PSWalletTestCase(TestCaseForTestnet):
              'Total fee: 10001')
         wfl, err = psman.create_new_denoms_wfl_from_gui(coins, None)
         txid = wfl.tx_order[0]
-        raw_tx = wfl.tx_data[txid].raw_tx
-        tx = Transaction(raw_tx)
+        tx = self.get_wfl_tx(wfl, txid)
         out_vals = [o.value for o in tx.outputs()]
         total_out_vals += sum(out_vals) - 809137
         assert out_vals == [90000, 100001, 100001, 100001, 100001, 100001,
@@ -2581,8 +2548,7 @@ class PSWalletTestCase(TestCaseForTestnet):
                             809137, 1000010, 1000010, 1000010, 1000010,
                             1000010, 1000010, 1000010, 1000010]
         txid = wfl.tx_order[1]
-        raw_tx = wfl.tx_data[txid].raw_tx
-        tx = Transaction(raw_tx)
+        tx = self.get_wfl_tx(wfl, txid)
         out_vals = [o.value for o in tx.outputs()]
         total_out_vals += sum(out_vals)
         assert out_vals == [100001, 100001, 100001, 100001, 100001, 100001,
@@ -2590,7 +2556,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert total_out_vals == 9990099
         # process
         for txid in wfl.tx_order:
-            tx = Transaction(wfl.tx_data[txid].raw_tx)
+            tx = self.get_wfl_tx(wfl, txid)
             psman._process_by_new_denoms_wfl(txid, tx)
         assert not psman.new_denoms_wfl
 
@@ -2600,8 +2566,7 @@ class PSWalletTestCase(TestCaseForTestnet):
                             confirmed_funding_only=True,
                             consider_islocks=True, min_rounds=0)
         coins = [c for c in coins if c.value_sats() == PS_DENOMS_VALS[-4]]
-        coins = sorted(coins, key=lambda x: x.ps_rounds)
-        coins = coins[0:1]
+        coins = [min(coins, key=lambda x: x.ps_rounds)]
         assert psman.new_denoms_from_coins_info(coins) == \
             ('Transactions type: PS New Denoms\n'
              'Count of transactions: 1\n'
@@ -2610,8 +2575,7 @@ class PSWalletTestCase(TestCaseForTestnet):
              'Total fee: 10001')
         wfl, err = psman.create_new_denoms_wfl_from_gui(coins, None)
         txid = wfl.tx_order[0]
-        raw_tx = wfl.tx_data[txid].raw_tx
-        tx = Transaction(raw_tx)
+        tx = self.get_wfl_tx(wfl, txid)
         out_vals = [o.value for o in tx.outputs()]
         total_out_vals += sum(out_vals)
         assert out_vals == [90000, 100001, 100001, 100001, 100001, 100001,
@@ -2619,7 +2583,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert total_out_vals == 990009
         # process
         for txid in wfl.tx_order:
-            tx = Transaction(wfl.tx_data[txid].raw_tx)
+            tx = self.get_wfl_tx(wfl, txid)
             psman._process_by_new_denoms_wfl(txid, tx)
         assert not psman.new_denoms_wfl
 
@@ -2630,21 +2594,17 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         # check if new_denoms_wfl is empty
         assert not psman.new_denoms_wfl
-        coro = psman.cleanup_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_new_denoms_wfl())
         assert not psman.new_denoms_wfl
 
         # check no cleanup if completed and tx_order is not empty
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         assert psman.new_denoms_wfl
-        coro = psman.cleanup_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_new_denoms_wfl())
         assert psman.new_denoms_wfl
 
         # check cleanup if not completed and tx_order is not empty
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         for txid in wfl.tx_order:
             assert w.db.get_transaction(txid) is not None
@@ -2653,8 +2613,7 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         wfl.completed = False
         psman.set_new_denoms_wfl(wfl)
-        coro = psman.cleanup_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_new_denoms_wfl())
         assert not psman.new_denoms_wfl
 
         for txid in wfl.tx_order:
@@ -2666,17 +2625,14 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         # check cleaned up with force
         assert not psman.new_denoms_wfl
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         assert psman.new_denoms_wfl
-        coro = psman.cleanup_new_denoms_wfl(force=True)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.cleanup_new_denoms_wfl(force=True))
         assert not psman.new_denoms_wfl
 
         # check cleaned up when all txs removed
         assert not psman.new_denoms_wfl
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         assert psman.new_denoms_wfl
         assert len(psman.new_denoms_wfl.tx_order) == 4
         txid = psman.new_denoms_wfl.tx_order[0]
@@ -2696,8 +2652,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         w = self.wallet
         psman = w.psman
         psman.state = PSStates.Mixing
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         assert wfl.completed
         tx_order = wfl.tx_order
@@ -2706,8 +2661,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert psman.last_denoms_tx_time == 0
         # check not broadcasted (no network)
         assert wfl.next_to_send(w) == tx_data[tx_order[0]]
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.broadcast_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         tx_data = wfl.tx_data
         for txid in wfl.tx_order:
@@ -2717,8 +2671,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert psman.last_denoms_tx_time == 0
         # check not broadcasted (mock network method raises)
         psman.network = NetworkBroadcastMock(pass_cnt=0)
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.broadcast_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         tx_data = wfl.tx_data
         for txid in wfl.tx_order:
@@ -2733,8 +2686,7 @@ class PSWalletTestCase(TestCaseForTestnet):
                 assert wfl.next_to_send(w) == tx_data[tx_order[i+1]]
         assert wfl.next_to_send(w) is None
         psman.network = NetworkBroadcastMock()
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.broadcast_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         tx_data = wfl.tx_data
         for i, txid in enumerate(tx_order):
@@ -2744,15 +2696,8 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         assert psman.last_denoms_tx_time == 0
         # check not broadcasted (mock network) but recently send failed
-        psman.network = NetworkBroadcastMock()
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        for i in range(4):
+            self.run_coro(psman.broadcast_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         tx_data = wfl.tx_data
         assert wfl.next_to_send(w) is not None
@@ -2766,14 +2711,10 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.set_new_denoms_wfl(wfl)
 
         psman.network = NetworkBroadcastMock()
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
-        coro = psman.broadcast_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.broadcast_new_denoms_wfl())
+        self.run_coro(psman.broadcast_new_denoms_wfl())
+        self.run_coro(psman.broadcast_new_denoms_wfl())
+        self.run_coro(psman.broadcast_new_denoms_wfl())
         assert psman.new_denoms_wfl
         assert time.time() - psman.last_denoms_tx_time < 100
 
@@ -2781,8 +2722,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         w = self.wallet
         psman = w.psman
         psman.state = PSStates.Mixing
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         uuid = wfl.uuid
 
@@ -2792,7 +2732,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         for i, txid in enumerate(wfl.tx_order):
             w.add_unverified_tx(txid, TX_HEIGHT_UNCONFIRMED)
             assert not w.is_local_tx(txid)
-            tx = Transaction(wfl.tx_data[txid].raw_tx)
+            tx = self.get_wfl_tx(wfl, txid)
             psman._process_by_new_denoms_wfl(txid, tx)
             wfl = psman.new_denoms_wfl
             if i == 0:
@@ -2847,20 +2787,16 @@ class PSWalletTestCase(TestCaseForTestnet):
     def _check_tx_io(self, tx, spend_to, spend_duffs, fee_duffs,
                      change=None, change_duffs=None,
                      include_ps=False, min_rounds=None):
+        ins = tx.inputs()
         o = tx.outputs()
-        in_duffs = 0
+        in_duffs = sum(_in_.value_sats() for _in_ in ins)
         out_duffs = 0
         if not include_ps and min_rounds is None:
-            for _in_ in tx.inputs():
-                in_duffs += _in_.value_sats()
+            for _in_ in ins:
                 assert _in_.ps_rounds is None
-        elif include_ps:
-            for _in_ in tx.inputs():
-                in_duffs += _in_.value_sats()
-        elif min_rounds is not None:
+        elif not include_ps:
             assert len(o) == 1
-            for _in_ in tx.inputs():
-                in_duffs += _in_.value_sats()
+            for _in_ in ins:
                 assert _in_.ps_rounds == min_rounds
 
         if change is not None:
@@ -2876,11 +2812,9 @@ class PSWalletTestCase(TestCaseForTestnet):
                 raise Exception(f'Unknown amount: {oi.value}')
         assert fee_duffs == (in_duffs - out_duffs)
 
+    @with_found_ps_txs
     def test_make_unsigned_transaction(self):
         w = self.wallet
-        psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         spend_to = 'yiXJV2PodX4uuadFtt6e7wMTNkydHpp8ns'
         change = 'yanRmD5ZR66L1G51ixvXvUiJEmso5trn97'
         test_amounts = [0.0123, 0.123, 1.23, 5.123]
@@ -2888,75 +2822,69 @@ class PSWalletTestCase(TestCaseForTestnet):
         test_changes = [0.00769774, 0.17699774, 0.26999626, 2.90506399]
 
         coins = w.get_spendable_coins(domain=None)
-        for i in range(len(test_amounts)):
-            amount_duffs = to_duffs(test_amounts[i])
-            change_duffs = to_duffs(test_changes[i])
+        for amount, fee, change_amount in zip(test_amounts, test_fees,
+                                              test_changes):
+            amount_duffs = to_duffs(amount)
+            change_duffs = to_duffs(change_amount)
             outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
             tx = w.make_unsigned_transaction(coins=coins, outputs=outputs)
-            self._check_tx_io(tx, spend_to, amount_duffs, test_fees[i],
+            self._check_tx_io(tx, spend_to, amount_duffs, fee,
                               change, change_duffs)
 
         # check max amount
         amount_duffs = to_duffs(9.84805841)
         outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
-        coins = w.get_spendable_coins(domain=None)
         tx = w.make_unsigned_transaction(coins=coins, outputs=outputs)
         self._check_tx_io(tx, spend_to, amount_duffs, 932)  # no change
 
         amount_duffs = to_duffs(9.84805842)  # NotEnoughFunds
         outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
-        coins = w.get_spendable_coins(domain=None)
         with self.assertRaises(NotEnoughFunds):
             tx = w.make_unsigned_transaction(coins=coins, outputs=outputs)
 
+    @with_found_ps_txs
     def test_make_unsigned_transaction_include_ps(self):
         w = self.wallet
-        psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         spend_to = 'yiXJV2PodX4uuadFtt6e7wMTNkydHpp8ns'
         change = 'yanRmD5ZR66L1G51ixvXvUiJEmso5trn97'
         test_amounts = [0.0123, 0.123, 1.23, 5.123]
         test_fees = [226, 226, 374, 374]
         test_changes = [0.00769774, 0.17699774, 0.26999626, 2.90506399]
 
-        coins = w.get_spendable_coins(domain=None, include_ps=True)
-        for i in range(len(test_amounts)):
-            amount_duffs = to_duffs(test_amounts[i])
-            change_duffs = to_duffs(test_changes[i])
+        coins = w.get_spendable_coins(domain=None)
+        ps_coins = w.get_spendable_coins(domain=None, include_ps=True)
+        for amount, fee, change_amount in zip(test_amounts, test_fees,
+                                              test_changes):
+            amount_duffs = to_duffs(amount)
+            change_duffs = to_duffs(change_amount)
             outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
-            tx = w.make_unsigned_transaction(coins=coins, outputs=outputs)
-            self._check_tx_io(tx, spend_to, amount_duffs, test_fees[i],
+            tx = w.make_unsigned_transaction(coins=ps_coins, outputs=outputs)
+            self._check_tx_io(tx, spend_to, amount_duffs, fee,
                               change, change_duffs)
 
         # check max amount
         amount_duffs = to_duffs(9.84805841)
         outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
-        coins = w.get_spendable_coins(domain=None)
         tx = w.make_unsigned_transaction(coins=coins, outputs=outputs)
         self._check_tx_io(tx, spend_to, amount_duffs, 932)  # no change
 
         # check with include_ps
         amount_duffs = to_duffs(14.84811305)
         outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
-        coins = w.get_spendable_coins(domain=None, include_ps=True)
-        tx = w.make_unsigned_transaction(coins=coins, outputs=outputs)
+        tx = w.make_unsigned_transaction(coins=ps_coins, outputs=outputs)
         self._check_tx_io(tx, spend_to, amount_duffs, 20468,  # no change
                           include_ps=True)
 
         # check max amount with include_ps
         amount_duffs = to_duffs(14.84811306)  # NotEnoughFunds
         outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
-        coins = w.get_spendable_coins(domain=None, include_ps=True)
         with self.assertRaises(NotEnoughFunds):
-            tx = w.make_unsigned_transaction(coins=coins, outputs=outputs)
+            tx = w.make_unsigned_transaction(coins=ps_coins, outputs=outputs)
 
+    @with_found_ps_txs
     def test_make_unsigned_transaction_min_rounds(self):
         C_RNDS = PSCoinRounds.COLLATERAL
         w = self.wallet
-        psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         spend_to = 'yiXJV2PodX4uuadFtt6e7wMTNkydHpp8ns'
 
         amount_duffs = to_duffs(1)
@@ -3021,14 +2949,17 @@ class PSWalletTestCase(TestCaseForTestnet):
                      62631, 78389, 19466, 25700, 32769, 50654, 19681, 3572,
                      69981, 70753, 45028, 8952]
         coins = w.get_spendable_coins(domain=None, min_rounds=2)
-        for i in range(len(test_amounts)):
-            amount_duffs = to_duffs(test_amounts[i])
-            outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
-            tx = w.make_unsigned_transaction(coins=coins, outputs=outputs,
-                                             min_rounds=2)
-            self._check_tx_io(tx, spend_to, amount_duffs,  # no change
-                              test_fees[i],
-                              min_rounds=2)
+        assert len(test_amounts) == len(test_fees)
+        for amount, fee in zip(test_amounts, test_fees):
+            with self.subTest(amount=amount):
+                amount_duffs = to_duffs(amount)
+                outputs = [PartialTxOutput.from_address_and_value(
+                    spend_to, amount_duffs)]
+                tx = w.make_unsigned_transaction(coins=coins,
+                                                 outputs=outputs,
+                                                 min_rounds=2)
+                self._check_tx_io(tx, spend_to, amount_duffs,  # no change
+                                  fee, min_rounds=2)
         assert min(test_fees) == 1000
         assert max(test_fees) == 100011
 
@@ -3036,9 +2967,8 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman = self.wallet.psman
         assert psman.double_spend_warn == ''
 
-        psman.state = PSStates.Mixing
-        assert psman.double_spend_warn != ''
-        psman.state = PSStates.Ready
+        with mixing_state(psman):
+            assert psman.double_spend_warn != ''
 
         psman.last_mix_stop_time = time.time()
         assert psman.double_spend_warn != ''
@@ -3056,11 +2986,10 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert psman.last_denoms_tx_time == now
         assert w.db.get_ps_data('last_denoms_tx_time') == now
 
+    @with_found_ps_txs
     def test_broadcast_transaction(self):
         w = self.wallet
         psman = w.psman
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.network = NetworkBroadcastMock()
 
         # check spending ps_collateral currently in mixing
@@ -3071,20 +3000,16 @@ class PSWalletTestCase(TestCaseForTestnet):
         outputs = [PartialTxOutput.from_address_and_value(dummy, COLLATERAL_VAL)]
         tx = w.make_unsigned_transaction(coins=inputs, outputs=outputs)
 
-        psman.state = PSStates.Mixing
-        with self.assertRaises(PSPossibleDoubleSpendError):
-            coro = psman.broadcast_transaction(tx)
-            asyncio.get_event_loop().run_until_complete(coro)
+        with mixing_state(psman):
+            with self.assertRaises(PSPossibleDoubleSpendError):
+                self.run_coro(psman.broadcast_transaction(tx))
 
-        psman.state = PSStates.Ready
         psman.last_mix_stop_time = time.time()
         with self.assertRaises(PSPossibleDoubleSpendError):
-            coro = psman.broadcast_transaction(tx)
-            asyncio.get_event_loop().run_until_complete(coro)
+            self.run_coro(psman.broadcast_transaction(tx))
 
         psman.last_mix_stop_time = time.time() - psman.wait_for_mn_txs_time
-        coro = psman.broadcast_transaction(tx)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.broadcast_transaction(tx))
 
         # check spending ps_denoms currently in mixing
         ps_denoms = w.db.get_ps_denoms()
@@ -3098,8 +3023,7 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         psman.last_mix_stop_time = time.time()
         with self.assertRaises(PSPossibleDoubleSpendError):
-            coro = psman.broadcast_transaction(tx)
-            asyncio.get_event_loop().run_until_complete(coro)
+            self.run_coro(psman.broadcast_transaction(tx))
 
     def test_sign_transaction(self):
         w = self.wallet
@@ -3108,7 +3032,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         # test sign with no _keypairs_cache
         coro = psman.create_new_collateral_wfl()
         psman.state = PSStates.Mixing
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(coro)
         wfl = psman.new_collateral_wfl
         assert wfl.completed
         psman._cleanup_new_collateral_wfl(force=True)
@@ -3116,8 +3040,7 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         # test sign with _keypairs_cache
         psman._cache_keypairs(password=None)
-        coro = psman.create_new_collateral_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_collateral_wfl())
         wfl = psman.new_collateral_wfl
         assert wfl.completed
         psman._cleanup_new_collateral_wfl(force=True)
@@ -3144,7 +3067,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert psman.calc_need_new_keypairs_cnt() == (2154, 136, False)
 
         coro = psman.find_untracked_ps_txs(log=False)  # find already mixed
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(coro)
 
         psman.mix_rounds = 2
         assert psman.calc_need_new_keypairs_cnt() == (388, 21, False)
@@ -3183,7 +3106,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert psman.calc_need_new_keypairs_cnt() == (1581, 100, False)
 
         coro = psman.find_untracked_ps_txs(log=False)  # find already mixed
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(coro)
 
         psman.mix_rounds = 2
         assert psman.calc_need_new_keypairs_cnt() == (370, 20, False)
@@ -3221,7 +3144,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert psman.calc_need_new_keypairs_cnt() == (7555, 480, True)
 
         coro = psman.find_untracked_ps_txs(log=False)  # find already mixed
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(coro)
 
         psman.mix_rounds = 2
         assert psman.calc_need_new_keypairs_cnt() == (1865, 100, True)
@@ -3238,13 +3161,12 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.mix_rounds = 16
         assert psman.calc_need_new_keypairs_cnt() == (17795, 1160, True)
 
+    @with_found_ps_txs
     def test_check_need_new_keypairs(self):
         w = self.wallet
         psman = w.psman
         psman.mix_rounds = 2
         psman.keep_amount = 2
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
 
         # check when wallet has no password
@@ -3295,13 +3217,12 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         w.has_password = prev_has_password
 
+    @with_found_ps_txs
     def test_find_addrs_not_in_keypairs(self):
         w = self.wallet
         psman = w.psman
         psman.mix_rounds = 2
         psman.keep_amount = 2
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
 
         spendable = ['yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF',
@@ -3342,6 +3263,10 @@ class PSWalletTestCase(TestCaseForTestnet):
         res = psman._find_addrs_not_in_keypairs(ps_change + ps_spendable)
         assert res == set()
 
+    def _check_keypairs_cache_sizes(self, psman, cache_results):
+        cache_sizes = {t: len(psman._keypairs_cache[t]) for t in KP_ALL_TYPES}
+        assert cache_sizes == dict(zip(KP_ALL_TYPES, cache_results))
+
     def test_cache_keypairs(self):
         w = self.wallet
         psman = w.psman
@@ -3352,8 +3277,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman._cache_keypairs(password=None)
         # types: incoming, spendable, ps spendable, ps coins, ps change
         cache_results = [0, 137, 0, 259, 12]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3363,8 +3287,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [0, 137, 0, 433, 24]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3374,22 +3297,20 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [0, 137, 0, 474, 26]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
 
         coro = psman.find_untracked_ps_txs(log=False)  # find already mixed
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(coro)
 
         psman.mix_rounds = 2
         psman.keep_amount = 2
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [0, 5, 55, 111, 8]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3399,8 +3320,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [0, 5, 132, 458, 31]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3410,8 +3330,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [0, 5, 132, 901, 55]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3428,7 +3347,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         coins = w.get_utxos(None, include_ps=True)
         for c in coins:
             val = c.value_sats()
-            if (val in PS_DENOMS_VALS
+            if (val in PS_DENOMS_DICT
                     or val in CREATE_COLLATERAL_VALS
                     or c.address in ['yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF',
                                      'yZwFosFcLXGWomh11ddUNgGBKCBp7yueyo']):
@@ -3439,22 +3358,19 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [5, 3, 0, 520, 30]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
 
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         for txid in wfl.tx_order:
             w.db.add_islock(txid)
-            tx = Transaction(wfl.tx_data[txid].raw_tx)
+            tx = self.get_wfl_tx(wfl, txid)
             psman._process_by_new_denoms_wfl(txid, tx)
         assert not psman.new_denoms_wfl
 
         # types: incoming, spendable, ps spendable, ps coins, ps change
         cache_results = [5, 3, 54, 466, 30]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3464,8 +3380,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [5, 3, 54, 2305, 140]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3475,22 +3390,20 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [5, 3, 54, 3170, 190]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
 
         coro = psman.find_untracked_ps_txs(log=False)  # find already mixed
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(coro)
 
         psman.mix_rounds = 2
         psman.keep_amount = 2
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [0, 3, 109, 218, 15]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3500,8 +3413,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [0, 3, 186, 673, 45]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3511,8 +3423,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [5, 3, 186, 4740, 300]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3523,16 +3434,11 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         coins0 = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
                              mature_only=True, include_ps=True)
-        coins = [c for c in coins0 if c.value_sats() < 50000000]
-        coins_str = {c.prevout.to_str() for c in coins}
-        w.set_frozen_state_of_coins(coins_str, True)
-        coins = [c for c in coins0 if c.value_sats() >= 100000000]
-        coins_str = {c.prevout.to_str() for c in coins}
+        coins_str = {c.prevout.to_str() for c in coins0
+                     if not 50000000 <= c.value_sats() < 100000000}
         w.set_frozen_state_of_coins(coins_str, True)
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True, include_ps=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c)]
-        assert sum([c.value_sats() for c in coins]) == 50000000  # 0.5 Dash
+        coins = [c for c in coins0 if not w.is_frozen_coin(c)]
+        assert sum(c.value_sats() for c in coins) == 50000000  # 0.5 Dash
 
         psman.mix_rounds = 2
         psman.keep_amount = 2
@@ -3540,8 +3446,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman._cache_keypairs(password=None)
         # types: incoming, spendable, ps spendable, ps coins, ps change
         cache_results = [5, 1, 0, 765, 40]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3551,8 +3456,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [5, 1, 0, 1275, 75]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3562,22 +3466,20 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [5, 1, 0, 2140, 120]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
 
         coro = psman.find_untracked_ps_txs(log=False)  # find already mixed
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(coro)
 
         psman.mix_rounds = 2
         psman.keep_amount = 2
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [0, 1, 55, 111, 8]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3587,8 +3489,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [0, 1, 132, 458, 31]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
@@ -3598,37 +3499,36 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Mixing
         psman._cache_keypairs(password=None)
         cache_results = [5, 1, 132, 3715, 230]
-        for i, cache_type in enumerate(KP_ALL_TYPES):
-            assert len(psman._keypairs_cache[cache_type]) == cache_results[i]
+        self._check_keypairs_cache_sizes(psman, cache_results)
         psman._cleanup_all_keypairs_cache()
         assert psman._keypairs_cache == {}
         psman.state = PSStates.Ready
 
+    def _cache_spendable_keypairs(self, psman):
+        '''Cache keypairs starting from keys cached in setUpClass'''
+        # incoming keys are not restored, as _cache_kp_incoming caches
+        # KP_MAX_INCOMING_TXS new keys on each run
+        psman._keypairs_cache = {t: dict(kps) for t, kps
+                                 in self.spendable_kp_cache.items()
+                                 if t != KP_INCOMING}
+        psman._cache_keypairs(password=None)
+        assert psman._keypairs_cache == self.spendable_kp_cache
+
+    @with_found_ps_txs
     def test_cleanup_spendable_keypairs(self):
         # check spendable keypair for change is not cleaned up if change amount
         # is small (change output placed in middle of outputs sorted by bip69)
         w = self.wallet
         psman = w.psman
         psman.keep_amount = 16  # raise keep amount to make small change val
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
 
         # freeze some coins to make small change amount
-        selected_coins_vals = [801806773, 50000000, 1000000]
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c) ]
-        coins = [c for c in coins if not c.value_sats() in selected_coins_vals]
-        coins_str = {c.prevout.to_str() for c in coins}
-        w.set_frozen_state_of_coins(coins_str, True)
+        self._freeze_for_spendable_keypairs(w)
 
         # check spendable coins
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c) ]
-        coins = sorted([c for c in coins if not w.is_frozen_coin(c)],
-                       key=lambda x: -x.value_sats())
+        coins = spendable_coins(w, mature_only=True)
+        coins.sort(key=lambda x: -x.value_sats())
         assert coins[0].address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
         assert coins[0].value_sats() == 801806773
         assert coins[1].address == 'yeeU1n6Bm4Y3rz7Y1JZb9gQAbsc4uv4Y5j'
@@ -3636,48 +3536,28 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert coins[2].address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
         assert coins[2].value_sats() == 1000000
 
-        psman._cache_keypairs(password=None)
-        spendable = ['yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF',
-                     'yeeU1n6Bm4Y3rz7Y1JZb9gQAbsc4uv4Y5j']
-        assert sorted(psman._keypairs_cache[KP_SPENDABLE].keys()) == spendable
+        self._cache_spendable_keypairs(psman)
+        spendable = {'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF',
+                     'yeeU1n6Bm4Y3rz7Y1JZb9gQAbsc4uv4Y5j'}
+        assert set(psman._keypairs_cache[KP_SPENDABLE]) == spendable
 
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         assert wfl.completed
 
-        txid = wfl.tx_order[0]
-        tx0 = Transaction(wfl.tx_data[txid].raw_tx)
-        txid = wfl.tx_order[1]
-        tx1 = Transaction(wfl.tx_data[txid].raw_tx)
-        txid = wfl.tx_order[2]
-        tx2 = Transaction(wfl.tx_data[txid].raw_tx)
-        txid = wfl.tx_order[3]
-        tx3 = Transaction(wfl.tx_data[txid].raw_tx)
-
-        outputs = tx0.outputs()
-        assert len(outputs) == 41
-        change = outputs[33]
-        assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
-
-        outputs = tx1.outputs()
-        assert len(outputs) == 24
-        change = outputs[22]
-        assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
-
-        outputs = tx2.outputs()
-        assert len(outputs) == 18
-        change = outputs[17]
-        assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
-
-        outputs = tx3.outputs()
-        assert len(outputs) == 8
-        change = outputs[7]
-        assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
+        # (outputs count, change output index) of new denoms txs
+        expected = [(41, 33), (24, 22), (18, 17), (8, 7)]
+        assert len(wfl.tx_order) == len(expected)
+        for txid, (outputs_cnt, change_idx) in zip(wfl.tx_order, expected):
+            outputs = self.get_wfl_tx(wfl, txid).outputs()
+            assert len(outputs) == outputs_cnt
+            change = outputs[change_idx]
+            assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
 
-        spendable = ['yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF']
-        assert sorted(psman._keypairs_cache[KP_SPENDABLE].keys()) == spendable
+        spendable = {'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'}
+        assert set(psman._keypairs_cache[KP_SPENDABLE]) == spendable
 
+    @with_found_ps_txs
     def test_cleanup_spendable_keypairs_group_origin_by_addr(self):
         # check spendable keypair for change is not cleaned up if change amount
         # is small (change output placed in middle of outputs sorted by bip69)
@@ -3685,25 +3565,14 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman = w.psman
         psman.group_origin_coins_by_addr = True
         psman.keep_amount = 16  # raise keep amount to make small change val
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
         psman.state = PSStates.Mixing
 
         # freeze some coins to make small change amount
-        selected_coins_vals = [801806773, 50000000, 1000000]
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c) ]
-        coins = [c for c in coins if not c.value_sats() in selected_coins_vals]
-        coins_str = {c.prevout.to_str() for c in coins}
-        w.set_frozen_state_of_coins(coins_str, True)
+        self._freeze_for_spendable_keypairs(w)
 
         # check spendable coins
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c) ]
-        coins = sorted([c for c in coins if not w.is_frozen_coin(c)],
-                       key=lambda x: -x.value_sats())
+        coins = spendable_coins(w, mature_only=True)
+        coins.sort(key=lambda x: -x.value_sats())
         assert coins[0].address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
         assert coins[0].value_sats() == 801806773
         assert coins[1].address == 'yeeU1n6Bm4Y3rz7Y1JZb9gQAbsc4uv4Y5j'
@@ -3711,59 +3580,38 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert coins[2].address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
         assert coins[2].value_sats() == 1000000
 
-        psman._cache_keypairs(password=None)
-        spendable = ['yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF',
-                     'yeeU1n6Bm4Y3rz7Y1JZb9gQAbsc4uv4Y5j']
-        assert sorted(psman._keypairs_cache[KP_SPENDABLE].keys()) == spendable
+        self._cache_spendable_keypairs(psman)
+        spendable = {'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF',
+                     'yeeU1n6Bm4Y3rz7Y1JZb9gQAbsc4uv4Y5j'}
+        assert set(psman._keypairs_cache[KP_SPENDABLE]) == spendable
 
-        coro = psman.create_new_denoms_wfl()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.create_new_denoms_wfl())
         wfl = psman.new_denoms_wfl
         assert wfl.completed
 
-        txid = wfl.tx_order[0]
-        tx0 = Transaction(wfl.tx_data[txid].raw_tx)
-        txid = wfl.tx_order[1]
-        tx1 = Transaction(wfl.tx_data[txid].raw_tx)
-        txid = wfl.tx_order[2]
-        tx2 = Transaction(wfl.tx_data[txid].raw_tx)
-        txid = wfl.tx_order[3]
-        tx3 = Transaction(wfl.tx_data[txid].raw_tx)
-
-        outputs = tx0.outputs()
-        assert len(outputs) == 40
-        change = outputs[33]
-        assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
-
-        outputs = tx1.outputs()
-        assert len(outputs) == 29
-        change = outputs[22]
-        assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
-
-        outputs = tx2.outputs()
-        assert len(outputs) == 18
-        change = outputs[17]
-        assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
-
-        outputs = tx3.outputs()
-        assert len(outputs) == 8
-        change = outputs[7]
-        assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
+        # (outputs count, change output index) of new denoms txs
+        expected = [(40, 33), (29, 22), (18, 17), (8, 7)]
+        assert len(wfl.tx_order) == len(expected)
+        for txid, (outputs_cnt, change_idx) in zip(wfl.tx_order, expected):
+            outputs = self.get_wfl_tx(wfl, txid).outputs()
+            assert len(outputs) == outputs_cnt
+            change = outputs[change_idx]
+            assert change.address == 'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF'
 
-        spendable = ['yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF',
-                     'yeeU1n6Bm4Y3rz7Y1JZb9gQAbsc4uv4Y5j']
-        assert sorted(psman._keypairs_cache[KP_SPENDABLE].keys()) == spendable
+        spendable = {'yRUktd39y5aU3JCgvZSx2NVfwPnv5nB2PF',
+                     'yeeU1n6Bm4Y3rz7Y1JZb9gQAbsc4uv4Y5j'}
+        assert set(psman._keypairs_cache[KP_SPENDABLE]) == spendable
 
     def test_filter_log_line(self):
         w = self.wallet
         test_line = ''
         assert filter_log_line(test_line) == test_line
 
-        txid = bh2u(bytes(random.getrandbits(8) for _ in range(32)))
+        txid = bh2u(os.urandom(32))
         test_line = 'load_and_cleanup rm %s ps data'
         assert filter_log_line(test_line % txid) == test_line % FILTERED_TXID
 
-        txid = bh2u(bytes(random.getrandbits(8) for _ in range(32)))
+        txid = bh2u(os.urandom(32))
         test_line = ('Error: err on checking tx %s from'
                      ' pay collateral workflow: wfl.uuid')
         assert filter_log_line(test_line % txid) == test_line % FILTERED_TXID
@@ -3778,8 +3626,7 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         assert psman.calc_denoms_by_values() == {}
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
 
         found_vals = {100001: 70, 1000010: 33, 10000100: 26,
                       100001000: 2, 1000010000: 0}
@@ -3847,8 +3694,7 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         assert psman.get_biggest_denoms_by_min_round() == []
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.find_untracked_ps_txs(log=False))
 
         coins = psman.get_biggest_denoms_by_min_round()
         res_r = [c.ps_rounds for c in coins]
@@ -3857,13 +3703,11 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert res_v == ([10000100] * 10 + [1000010] * 12 + [100001000] * 2 +
                          [10000100] * 16 + [1000010] * 21)
 
+    @with_found_ps_txs
     def test_all_mixed(self):
         w = self.wallet
         psman = w.psman
 
-        coro = psman.find_untracked_ps_txs(log=False)
-        asyncio.get_event_loop().run_until_complete(coro)
-
         # move spendable to ps_others
         for c in w.get_spendable_coins(domain=None):
             outpoint = c.prevout.to_str()
@@ -3877,9 +3721,6 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert ps_balance == 0
         assert not psman.all_mixed
 
-        dn_balance = sum(w.get_balance(include_ps=False, min_rounds=0))
-        ps_balance = sum(w.get_balance(include_ps=False, min_rounds=r))
-
         # set rounds to psman.mix_rounds
         for outpoint in list(w.db.get_ps_denoms()):
             addr, val, prev_r = psman.pop_ps_denom(outpoint)
@@ -3901,14 +3742,6 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.keep_amount = 6
         assert not psman.all_mixed
 
-    def enable_ps_ks(func):
-        def setup_multi_ks(self, *args, **kwargs):
-            w = self.wallet
-            psman = w.psman
-            psman.enable_ps_keystore()
-            return func(self, *args, **kwargs)
-        return setup_multi_ks
-
     @enable_ps_ks
     def test_enable_ps_keystore(self):
         w = self.wallet
@@ -3916,17 +3749,15 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         assert type(psman.ps_keystore) == keystore.PS_BIP32_KeyStore
         assert psman.ps_ks_txin_type == 'p2pkh'
-        keystore_d = copy.deepcopy(dict(w.keystore.dump()))
-        keystore_d['type'] = 'ps_bip32'
+        ks_dump = w.keystore.dump()
+        keystore_d = dict(ks_dump, type='ps_bip32')
         assert psman.ps_keystore.dump() == keystore_d
 
         keystore_d['addr_deriv_offset'] = 2
         w.db.put('ps_keystore', keystore_d)
         psman.load_ps_keystore()
 
-        keystore_d = copy.deepcopy(w.keystore.dump())
-        keystore_d['type'] = 'ps_bip32'
-        keystore_d['addr_deriv_offset'] = 2
+        keystore_d = dict(ks_dump, type='ps_bip32', addr_deriv_offset=2)
         assert psman.ps_keystore.dump() == keystore_d
 
     @enable_ps_ks
@@ -3934,15 +3765,13 @@ class PSWalletTestCase(TestCaseForTestnet):
         w = self.wallet
         psman = w.psman
 
-        keystore_d = copy.deepcopy(w.keystore.dump())
         xprv = ('tprv8gcGuHWitNxNiGHB37gwo6m41W1fNZBT5m79Fr56Q5F7HkagvRpCCPEs'
                 'bPK9xcZFtQe9pcvBrDsEmGfzsY2bsB34MqbwVHFdapts9YM233g')
-        assert keystore_d['xprv'] == xprv
+        assert w.keystore.dump()['xprv'] == xprv
 
         w.update_password(None, 'test password')
 
-        keystore_d = copy.deepcopy(w.keystore.dump())
-        keystore_d['type'] = 'ps_bip32'
+        keystore_d = dict(w.keystore.dump(), type='ps_bip32')
         assert psman.ps_keystore.dump() == keystore_d
         assert keystore_d['xprv'] != xprv  # encrypted xprv
 
@@ -3967,14 +3796,6 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert ps_pubk_chg.hex() == ('0253bb653ff17f4a5da462ed674c3ace'
                                      '7ed1e94d9b01712c2738ac3d06ee75289c')
 
-    def synchronize_ps_ks(func):
-        def generate_ps_addrs(self, *args, **kwargs):
-            w = self.wallet
-            psman = w.psman
-            psman.synchronize()
-            return func(self, *args, **kwargs)
-        return generate_ps_addrs
-
     @enable_ps_ks
     @synchronize_ps_ks
     def test_ps_ks_addrs_sync(self):
@@ -4061,12 +3882,10 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.w_ks_type = 'hardware'  # mock
         psman.create_ps_ks_from_seed_ext_password(TEST_MNEMONIC, '222', None)
         ps_ks_dump = psman.ps_keystore.dump()
-        assert sorted(ps_ks_dump.keys()) == sorted(['type', 'pw_hash_version',
-                                                    'seed', 'seed_type',
-                                                    'passphrase',
-                                                    'xpub', 'xprv',
-                                                    'derivation',
-                                                    'root_fingerprint'])
+        self.assertCountEqual(ps_ks_dump, ['type', 'pw_hash_version',
+                                           'seed', 'seed_type', 'passphrase',
+                                           'xpub', 'xprv', 'derivation',
+                                           'root_fingerprint'])
         assert ps_ks_dump['type'] == 'ps_bip32'
         assert ps_ks_dump['pw_hash_version'] == 1
         assert ps_ks_dump['seed'] == TEST_MNEMONIC
@@ -4181,17 +4000,12 @@ class PSWalletTestCase(TestCaseForTestnet):
         # test with spendable amount > keep_amount
         coins0 = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
                              mature_only=True, include_ps=True)
-        coins = [c for c in coins0 if c.value_sats() < 50000000]
-        coins_str = {c.prevout.to_str() for c in coins}
-        w.set_frozen_state_of_coins(coins_str, True)
-        coins = [c for c in coins0 if c.value_sats() > 800000000]
-        coins_str = {c.prevout.to_str() for c in coins}
+        coins_str = {c.prevout.to_str() for c in coins0
+                     if not 50000000 <= c.value_sats() <= 800000000}
         w.set_frozen_state_of_coins(coins_str, True)
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True, include_ps=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c)]
+        coins = [c for c in coins0 if not w.is_frozen_coin(c)]
 
-        assert sum([c.value_sats() for c in coins]) == 350002000  # 3.5 Dash
+        assert sum(c.value_sats() for c in coins) == 350002000  # 3.5 Dash
 
         tx = psman.prepare_funds_from_hw_wallet()
         assert tx.txid()
@@ -4212,13 +4026,11 @@ class PSWalletTestCase(TestCaseForTestnet):
         assert psman.is_ps_ks(ps_ks_out.address)
 
         # test with spendable amount < keep_amount
-        coins = [c for c in coins0 if c.value_sats() >= 100000000]
-        coins_str = {c.prevout.to_str() for c in coins}
+        coins_str = {c.prevout.to_str() for c in coins0
+                     if c.value_sats() >= 100000000}
         w.set_frozen_state_of_coins(coins_str, True)
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True, include_ps=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c)]
-        assert sum([c.value_sats() for c in coins]) == 50000000  # 0.5 Dash
+        coins = [c for c in coins0 if not w.is_frozen_coin(c)]
+        assert sum(c.value_sats() for c in coins) == 50000000  # 0.5 Dash
 
         tx = psman.prepare_funds_from_hw_wallet()
         assert tx.txid()
@@ -4290,7 +4102,7 @@ class PSWalletTestCase(TestCaseForTestnet):
         out_rounds = psman._calc_rounds_for_denominate_tx(new_outpoints,
                                                           input_rounds)
         assert out_rounds is not input_rounds
-        assert out_rounds == list(map(lambda x: x+1, input_rounds[:]))
+        assert out_rounds == [r + 1 for r in input_rounds]
 
         psman.w_ks_type = 'hardware'  # mock
         out_rounds = psman._calc_rounds_for_denominate_tx(new_outpoints,
@@ -4320,9 +4132,7 @@ class PSWalletTestCase(TestCaseForTestnet):
             psman.prepare_funds_from_ps_keystore(None)
 
         unused = psman.get_unused_addresses()
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True, include_ps=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c)]
+        coins = spendable_coins(w, mature_only=True, include_ps=True)
 
         coins1 = coins[:1]
         oaddr1 = unused[0]
@@ -4353,10 +4163,8 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         assert not psman.check_funds_on_ps_keystore()
 
-        coins = w.get_utxos(None, excluded_addresses=w._frozen_addresses,
-                            mature_only=True, include_ps=True)
-        coins = [c for c in coins if not w.is_frozen_coin(c)]
-        coins = coins[:1]
+        coins = spendable_coins(w, mature_only=True, include_ps=True)[:1]
+        assert coins
         unused = psman.get_unused_addresses()
         oaddr = unused[0]
         outputs = [PartialTxOutput.from_address_and_value(oaddr, '!')]
@@ -4375,8 +4183,7 @@ class PSWalletTestCase(TestCaseForTestnet):
             if psman.prob_denominate_tx_coin(c):
                 denom_coins.append(c)
         assert len(denom_coins) == 78
-        coro = psman.find_untracked_ps_txs(log=False)
-        found_txs = asyncio.get_event_loop().run_until_complete(coro)
+        found_txs = self.run_coro(psman.find_untracked_ps_txs(log=False))
         for c in denom_coins:
             utxos = w.get_utxos([c.address])
             assert len(utxos) == 1
@@ -4427,14 +4234,19 @@ class PSWalletTestCase(TestCaseForTestnet):
                      69981, 70753, 45028, 8952]
         coins = w.get_spendable_coins(domain=None,
                                       min_rounds=2, no_ps_data=True)
-        for i in range(len(test_amounts)):
-            amount_duffs = to_duffs(test_amounts[i])
-            outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
-            tx = w.make_unsigned_transaction(coins=coins, outputs=outputs,
-                                             min_rounds=2, no_ps_data=True)
-            self._check_tx_io(tx, spend_to, amount_duffs,  # no change
-                              test_fees[i],
-                              min_rounds=0)
+        assert len(test_amounts) == len(test_fees)
+        for amount, fee in zip(test_amounts, test_fees):
+            with self.subTest(amount=amount):
+                amount_duffs = to_duffs(amount)
+                outputs = [PartialTxOutput.from_address_and_value(
+                    spend_to, amount_duffs)]
+                tx = w.make_unsigned_transaction(coins=coins,
+                                                 outputs=outputs,
+                                                 min_rounds=2,
+                                                 no_ps_data=True)
+                self._check_tx_io(tx, spend_to, amount_duffs,  # no change
+                                  fee,
+                                  min_rounds=0)
         assert min(test_fees) == 1000
         assert max(test_fees) == 100011
 
@@ -4448,19 +4260,14 @@ class PSWalletTestCase(TestCaseForTestnet):
         coins = w.get_spendable_coins(domain=None,
                                       include_ps=True, no_ps_data=True)
         test_amounts = [3.0, 5.0, 7.0, 10.98, 11.0, 13.0, 14.8]
-        for i in range(len(test_amounts)):
-            amount_duffs = to_duffs(test_amounts[i])
+        for amount in test_amounts:
+            amount_duffs = to_duffs(amount)
             outputs = [PartialTxOutput.from_address_and_value(spend_to, amount_duffs)]
             tx = w.make_unsigned_transaction(coins=coins, outputs=outputs,
                                              no_ps_data=True)
-            if amount_duffs < 1098000000:
-                for txin in tx.inputs():
-                    assert txin.value_sats() not in PS_DENOMS_VALS
-            else:
-                found = 0
-                for txin in tx.inputs():
-                    found += 1 if txin.value_sats() in PS_DENOMS_VALS else 0
-                assert found > 0
+            denoms_spent = any(txin.value_sats() in PS_DENOMS_DICT
+                               for txin in tx.inputs())
+            assert denoms_spent == (amount_duffs >= 1098000000)
 
     def test_PSKsInternalAddressCorruption(self):
         e = PSKsInternalAddressCorruption()
@@ -4473,7 +4280,7 @@ class PSWalletTestCase(TestCaseForTestnet):
 
         async def test_coro():
             psman.on_wallet_password_set()
-        asyncio.get_event_loop().run_until_complete(test_coro())
+        self.run_coro(test_coro())
 
     def test_clean_keypairs_on_timeout(self):
         w = self.wallet
@@ -4483,18 +4290,15 @@ class PSWalletTestCase(TestCaseForTestnet):
         psman.state = PSStates.Ready
         psman.keypairs_state = KPStates.Unused
         psman.last_mix_stop_time = time.time()
-        coro = psman.clean_keypairs_on_timeout()
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman.clean_keypairs_on_timeout())
 
     def test_make_keypairs_cache(self):
         w = self.wallet
         psman = w.psman
         psman.state = PSStates.Mixing
         psman.keypairs_state = KPStates.NeedCache
-        coro = psman._make_keypairs_cache(None)
-        asyncio.get_event_loop().run_until_complete(coro)
-        coro = psman._make_keypairs_cache('')
-        asyncio.get_event_loop().run_until_complete(coro)
+        self.run_coro(psman._make_keypairs_cache(None))
+        self.run_coro(psman._make_keypairs_cache(''))
 
     @enable_ps_ks
     @synchronize_ps_ks
@@ -28,7 +28,7 @@ import json
 import copy
 import threading
 import time
-from collections import defaultdict
+from collections import defaultdict, Counter
 from typing import Dict, Optional, List, Tuple, Set, Iterable, NamedTuple, Sequence, TYPE_CHECKING, Union
 import binascii
 
@@ -1194,21 +1194,16 @@ class WalletDB(JsonDB):
     @locked
     def select_ps_reserved(self, for_change=False, data=None):
         imp_addrs = getattr(self, 'imported_addresses', None)
-        imp_addrs = list(imp_addrs.keys()) if imp_addrs else []
         if for_change:
             w_addrs = imp_addrs if imp_addrs else self.change_addresses
-            sub_addrs = w_addrs + self.ps_ks_change_addrs
+            ps_ks_addrs = self.ps_ks_change_addrs
         else:
             w_addrs = imp_addrs if imp_addrs else self.receiving_addresses
-            sub_addrs = w_addrs + self.ps_ks_receiving_addrs
-        res = []
-        for addr, addr_data in self.ps_reserved.items():
-            if addr not in sub_addrs:
-                continue
-            if addr_data != data:
-                continue
-            res.append(addr)
-        return res
+            ps_ks_addrs = self.ps_ks_receiving_addrs
+        sub_addrs = set(w_addrs)
+        sub_addrs.update(ps_ks_addrs)
+        return [addr for addr, addr_data in self.ps_reserved.items()
+                if addr_data == data and addr in sub_addrs]
 
     @modifier  # do not use directly, use PSManager method of the same name
     def _add_ps_denom(self, outpoint, denom):
@@ -1313,16 +1308,30 @@ class WalletDB(JsonDB):
     def get_ps_spent_collaterals(self):
         return self.ps_spent_collaterals
 
+    def _count_ps_origin_addrs(self, addrs, delta):
+        for addr in set(addrs):
+            cnt = self._ps_origin_addrs_cnt[addr] + delta
+            if cnt > 0:
+                self._ps_origin_addrs_cnt[addr] = cnt
+            else:
+                self._ps_origin_addrs_cnt.pop(addr, None)
+
     @modifier
     def add_ps_origin_addrs(self, txid, data):
-        if isinstance(data, (list, tuple)):
-            self.ps_origin_addrs[txid] = data
-        else:
-            self.ps_origin_addrs[txid] = [data]
+        if not isinstance(data, (list, tuple)):
+            data = [data]
+        prev_data = self.ps_origin_addrs.get(txid)
+        if prev_data is not None:
+            self._count_ps_origin_addrs(prev_data, -1)
+        self.ps_origin_addrs[txid] = data
+        self._count_ps_origin_addrs(data, 1)
 
     @modifier
     def pop_ps_origin_addrs(self, txid):
-        return self.ps_origin_addrs.pop(txid, None)
+        data = self.ps_origin_addrs.pop(txid, None)
+        if data is not None:
+            self._count_ps_origin_addrs(data, -1)
+        return data
 
     @locked
     def get_tx_ps_origin_addrs(self, txid):
@@ -1330,9 +1339,11 @@ class WalletDB(JsonDB):
 
     @locked
     def get_ps_origin_addrs(self):
-        return list({addr
-                     for addrs in self.ps_origin_addrs.values()
-                     for addr in addrs})
+        return list(self._ps_origin_addrs_cnt)
+
+    @locked
+    def is_ps_origin_addr(self, addr):
+        return addr in self._ps_origin_addrs_cnt
 
     @locked
     def get_ps_addresses(self, min_rounds=None):
@@ -1632,6 +1643,10 @@ class WalletDB(JsonDB):
         self.ps_spent_others = self.get_dict('ps_spent_others')  # outpoint -> (addr, val)
         self.ps_spent_collaterals = self.get_dict('ps_spent_collaterals')  # outpoint -> (addr, val)
         self.ps_origin_addrs = self.get_dict('ps_origin_addrs')  # txid -> [addr, ...] new denoms/new collateral inputs
+        # addr -> count of ps_origin_addrs txs which have addr in inputs
+        self._ps_origin_addrs_cnt = Counter()
+        for addrs in self.ps_origin_addrs.values():
+            self._count_ps_origin_addrs(addrs, 1)
         self.tx_fees = self.get_dict('tx_fees')                  # type: Dict[str, TxFeesValue]
         # scripthash -> set of (outpoint, value)
         self._prevouts_by_scripthash = self.get_dict('prevouts_by_scripthash')  # type: Dict[str, Set[Tuple[str, int]]]
@@ -1674,6 +1689,7 @@ class WalletDB(JsonDB):
         self.ps_spending_collaterals.clear()
         self.ps_spent_collaterals.clear()
         self.ps_origin_addrs.clear()
+        self._ps_origin_addrs_cnt.clear()
         self.ps_denoms.clear()
         self.ps_spending_denoms.clear()
         self.ps_spent_denoms.clear()